@@ -28,11 +28,126 @@ from habitat.utils.visualizations import maps
 from habitat_sim.utils import viz_utils as vut
 from habitat.core.simulator import Observations
 
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """No-op decorator used when Numba is not installed"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
 # Quiet the Habitat simulator logging
 os.environ["MAGNUM_LOG"] = "quiet"
 os.environ["HABITAT_SIM_LOG"] = "quiet"
 
 
+# (dataset name, directory under scene_datasets)
+SCENE_DATASETS = (
+    ("mp3d", "mp3d"),  # Matterport3D
+    ("habitat-test-scenes", "habitat-test-scenes"),  # Test scenes
+    ("replica_cad", "replica_cad"),  # Replica CAD
+    ("hm3d", "hm3d"),  # HM3D
+)
+
+
+# Colors for the topdown map cell classes; the table covers every uint8
+# value, so no map cell can index outside it
+TOPDOWN_MAP_COLORS = np.zeros((256, 3), dtype=np.uint8)
+TOPDOWN_MAP_COLORS[:3] = [[255, 255, 255], [128, 128, 128], [0, 0, 0]]
+
+
+# Size of one view in the observation mosaic, and the window it is shown in
+MOSAIC_TILE_SIZE = 512
+MOSAIC_WINDOW = "Coordinate Navigation"
+
+
+def _mosaic_tile(bgr: Optional[np.ndarray], title: str) -> np.ndarray:
+    """Fit a BGR image into a square mosaic tile (black if missing) and label it"""
+    tile = np.zeros((MOSAIC_TILE_SIZE, MOSAIC_TILE_SIZE, 3), dtype=np.uint8)
+    if bgr is not None:
+        height, width = bgr.shape[:2]
+        scale = MOSAIC_TILE_SIZE / max(height, width)
+        if scale != 1.0:
+            bgr = cv2.resize(bgr, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        height, width = bgr.shape[:2]
+        top = (MOSAIC_TILE_SIZE - height) // 2
+        left = (MOSAIC_TILE_SIZE - width) // 2
+        tile[top:top + height, left:left + width] = bgr
+    cv2.putText(tile, title, (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 3, cv2.LINE_AA)
+    cv2.putText(tile, title, (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 1, cv2.LINE_AA)
+    return tile
+
+
+# Scene file extensions in order of preference
+TEST_SCENE_EXTENSIONS = (".glb", ".mesh.ply", ".ply")
+SCENE_EXTENSIONS = (".glb", ".ply")
+
+
+def _extension_rank(scene_file: str) -> int:
+    """Preference of a scene file by extension, lower is better"""
+    for rank, ext in enumerate(TEST_SCENE_EXTENSIONS):
+        if scene_file.endswith(ext):
+            return rank
+    return len(TEST_SCENE_EXTENSIONS)
+
+
+def _first_existing(paths) -> Optional[str]:
+    """First path that exists, probed with one stat call each"""
+    for path in paths:
+        try:
+            os.stat(path)
+        except OSError:
+            continue
+        return path
+    return None
+
+
+def _scan_available_scenes(scene_datasets_path: str) -> List[Tuple[str, str]]:
+    """Scan the scene datasets for (scene id, scene file) pairs"""
+    scenes = []
+    
+    for dataset_name, dataset_dir in SCENE_DATASETS:
+        dataset_path = os.path.join(scene_datasets_path, dataset_dir)
+        if not os.path.isdir(dataset_path):
+            continue
+        # scandir returns the entry type from readdir, so is_dir() needs no extra stat
+        with os.scandir(dataset_path) as entries:
+            # For habitat-test-scenes, files are directly in the directory
+            if dataset_name == "habitat-test-scenes":
+                for entry in entries:
+                    item = entry.name
+                    if item.endswith(('.glb', '.ply')) and entry.is_file():
+                        scene_name = item.replace('.glb', '').replace('.mesh.ply', '').replace('.ply', '')
+                        scenes.append((f"{dataset_name}/{scene_name}", entry.path))
+            else:
+                # For other datasets, check subdirectories
+                for entry in entries:
+                    if entry.is_dir():
+                        item = entry.name
+                        # Check if scene has required files
+                        scene_file = _first_existing(
+                            os.path.join(entry.path, item + ext) for ext in SCENE_EXTENSIONS
+                        )
+                        if scene_file is not None:
+                            scenes.append((f"{dataset_name}/{item}", scene_file))
+    
+    return scenes
+
+
+@njit(cache=True)
+def _quat_from_yaw(yaw):
+    """Quaternion [x, y, z, w] for a rotation of yaw radians about the Y axis"""
+    half = 0.5 * yaw
+    return 0.0, math.sin(half), 0.0, math.cos(half)
+
+
+@njit(cache=True)
+def _quat_facing(dx, dz):
+    """Quaternion [x, y, z, w] facing the XZ direction (dx, dz)"""
+    return _quat_from_yaw(math.atan2(dz, dx))
+
+
 class CoordinateNavigationAgent:
     """
     Agent for coordinate-based navigation in Matterport scenes
@@ -53,15 +168,26 @@ class CoordinateNavigationAgent:
         self.current_position = [0.0, 0.0, 0.0]
         self.current_rotation = [0.0, 0.0, 0.0, 1.0]  # quaternion
         self.available_scenes = []
+        # Scene file for each available scene, filled by _get_available_scenes
+        self._scene_files: Dict[str, str] = {}
+        # Recolored topdown map of the loaded scene; it does not change while the agent moves
+        self._base_colored_map = None
         
         # Camera parameters
         self.camera_height = 1.5  # meters
         self.fov = 90  # degrees
         
+        # Compile the quaternion helpers now (or load them from the Numba
+        # cache) instead of on the first navigation command
+        _quat_from_yaw(0.0)
+        _quat_facing(1.0, 0.0)
+        
         self._setup_environment()
     
     def _setup_environment(self):
         """Setup Habitat environment with Matterport dataset"""
+        self._base_colored_map = None
+        
         # Check if any dataset exists
         scene_datasets_path = os.path.join(self.data_path, "scene_datasets")
         if not os.path.exists(scene_datasets_path):
@@ -76,8 +202,9 @@ class CoordinateNavigationAgent:
             print("No scenes found! Available datasets:")
             scene_datasets_path = os.path.join(self.data_path, "scene_datasets")
             if os.path.exists(scene_datasets_path):
-                for item in os.listdir(scene_datasets_path):
-                    print(f"  - {item}")
+                with os.scandir(scene_datasets_path) as entries:
+                    for entry in entries:
+                        print(f"  - {entry.name}")
             return
         
         # Select scene
@@ -102,68 +229,43 @@ class CoordinateNavigationAgent:
     
     def _get_available_scenes(self) -> List[str]:
         """Get list of available scenes from multiple datasets"""
-        scenes = []
         scene_datasets_path = os.path.join(self.data_path, "scene_datasets")
         
-        # Check different dataset types
-        dataset_paths = [
-            ("mp3d", "mp3d"),  # Matterport3D
-            ("habitat-test-scenes", "habitat-test-scenes"),  # Test scenes
-            ("replica_cad", "replica_cad"),  # Replica CAD
-            ("hm3d", "hm3d"),  # HM3D
-        ]
-        
-        for dataset_name, dataset_dir in dataset_paths:
-            dataset_path = os.path.join(scene_datasets_path, dataset_dir)
-            if os.path.exists(dataset_path):
-                # For habitat-test-scenes, files are directly in the directory
-                if dataset_name == "habitat-test-scenes":
-                    for item in os.listdir(dataset_path):
-                        if item.endswith('.glb') or item.endswith('.ply'):
-                            scene_name = item.replace('.glb', '').replace('.mesh.ply', '').replace('.ply', '')
-                            scenes.append(f"{dataset_name}/{scene_name}")
-                else:
-                    # For other datasets, check subdirectories
-                    for item in os.listdir(dataset_path):
-                        scene_path = os.path.join(dataset_path, item)
-                        if os.path.isdir(scene_path):
-                            # Check if scene has required files
-                            glb_file = os.path.join(scene_path, f"{item}.glb")
-                            ply_file = os.path.join(scene_path, f"{item}.ply")
-                            if os.path.exists(glb_file) or os.path.exists(ply_file):
-                                scenes.append(f"{dataset_name}/{item}")
-        
-        return scenes
+        scenes = _scan_available_scenes(scene_datasets_path)
+        
+        # Remember the scene files so _create_config does not probe for them again;
+        # for test scenes with several files keep the preferred extension
+        self._scene_files = {}
+        for scene, scene_file in scenes:
+            current = self._scene_files.get(scene)
+            if current is None or _extension_rank(scene_file) < _extension_rank(current):
+                self._scene_files[scene] = scene_file
+        return [scene for scene, _ in scenes]
     
     def _create_config(self) -> habitat_sim.Configuration:
         """Create Habitat-Sim configuration"""
-        # Parse scene path
-        dataset_name, scene_id = self.scene_id.split('/', 1)
-        
-        # Determine scene file path
-        if dataset_name == "habitat-test-scenes":
-            # Files are directly in the dataset directory
-            scene_base_path = os.path.join(self.data_path, "scene_datasets", dataset_name)
-            scene_file = None
-            for ext in [".glb", ".mesh.ply", ".ply"]:
-                potential_file = os.path.join(scene_base_path, f"{scene_id}{ext}")
-                if os.path.exists(potential_file):
-                    scene_file = potential_file
-                    break
-        else:
-            # Files are in subdirectories
-            scene_base_path = os.path.join(
-                self.data_path, 
-                "scene_datasets", 
-                dataset_name, 
-                scene_id
+        scene_file = self._scene_files.get(self.scene_id)
+        if scene_file is None:
+            # Parse scene path
+            dataset_name, scene_id = self.scene_id.split('/', 1)
+            
+            # Determine scene file path
+            if dataset_name == "habitat-test-scenes":
+                # Files are directly in the dataset directory
+                scene_base_path = os.path.join(self.data_path, "scene_datasets", dataset_name)
+                extensions = TEST_SCENE_EXTENSIONS
+            else:
+                # Files are in subdirectories
+                scene_base_path = os.path.join(
+                    self.data_path, 
+                    "scene_datasets", 
+                    dataset_name, 
+                    scene_id
+                )
+                extensions = SCENE_EXTENSIONS
+            scene_file = _first_existing(
+                os.path.join(scene_base_path, f"{scene_id}{ext}") for ext in extensions
             )
-            scene_file = None
-            for ext in [".glb", ".ply"]:
-                potential_file = os.path.join(scene_base_path, f"{scene_id}{ext}")
-                if os.path.exists(potential_file):
-                    scene_file = potential_file
-                    break
         
         if scene_file is None:
             raise ValueError(f"Scene file not found for {self.scene_id}")
@@ -250,7 +352,7 @@ class CoordinateNavigationAgent:
         
         # Random rotation (quaternion format: [x, y, z, w])
         yaw = random.uniform(0, 2*np.pi)
-        self.current_rotation = [0.0, np.sin(yaw/2), 0.0, np.cos(yaw/2)]
+        self.current_rotation = list(_quat_from_yaw(yaw))
         
         # Set agent state
         agent_state = habitat_sim.AgentState()
@@ -273,16 +375,17 @@ class CoordinateNavigationAgent:
         if self.sim is None:
             return np.array([])
         
-        # Generate topdown map
-        top_down_map = maps.get_topdown_map_from_sim(
-            self.sim, map_resolution=1024, draw_border=True
-        )
+        if self._base_colored_map is None:
+            # Generate topdown map
+            top_down_map = maps.get_topdown_map_from_sim(
+                self.sim, map_resolution=1024, draw_border=True
+            )
+            
+            # Recolor map for better visualization
+            self._base_colored_map = np.take(TOPDOWN_MAP_COLORS, top_down_map, axis=0)
         
-        # Recolor map for better visualization
-        recolor_map = np.array(
-            [[255, 255, 255], [128, 128, 128], [0, 0, 0]], dtype=np.uint8
-        )
-        top_down_map = recolor_map[top_down_map]
+        # Copy so callers can draw on the map without touching the cache
+        top_down_map = self._base_colored_map.copy()
         
         return top_down_map
     
@@ -314,8 +417,7 @@ class CoordinateNavigationAgent:
         
         if np.linalg.norm(direction) > 0:
             # Calculate rotation to face target (quaternion format)
-            angle = np.arctan2(direction[2], direction[0])
-            rotation = [0.0, np.sin(angle/2), 0.0, np.cos(angle/2)]
+            rotation = list(_quat_facing(float(direction[0]), float(direction[2])))
             
             # Update agent state
             agent_state = habitat_sim.AgentState()
@@ -344,14 +446,14 @@ class CoordinateNavigationAgent:
             return
         
         # Convert to radians
-        yaw_rad = np.radians(yaw_delta)
-        pitch_rad = np.radians(pitch_delta)
+        yaw_rad = math.radians(yaw_delta)
+        pitch_rad = math.radians(pitch_delta)
         
         # Get current rotation quaternion
         current_rotation = self.sim.get_agent(0).get_state().rotation
         
         # Create rotation quaternions for yaw and pitch
-        yaw_quat = [0.0, np.sin(yaw_rad/2), 0.0, np.cos(yaw_rad/2)]
+        yaw_quat = list(_quat_from_yaw(yaw_rad))
         
         # For simplicity, just update yaw for now
         # In a full implementation, you'd want proper quaternion multiplication
@@ -365,14 +467,72 @@ class CoordinateNavigationAgent:
         self.current_rotation = new_rotation
         print(f"Adjusted view angle - Yaw: {yaw_delta}°, Pitch: {pitch_delta}°")
     
-    def display_observations(self, save_images: bool = False):
-        """Display current observations"""
+    def display_observations(self, save_images: bool = False, use_matplotlib: bool = False):
+        """
+        Display current observations
+        
+        Args:
+            save_images: Also save each view as a PNG file
+            use_matplotlib: Show a matplotlib figure instead of the OpenCV mosaic
+        """
         observations = self.get_current_observations()
         
         if not observations:
             print("No observations available")
             return
         
+        if use_matplotlib:
+            self._display_observations_matplotlib(observations, save_images)
+        else:
+            self._display_observations_mosaic(observations, save_images)
+    
+    def _display_observations_mosaic(self, observations: Dict[str, np.ndarray], save_images: bool):
+        """Show the four views as one 2x2 OpenCV mosaic"""
+        safe_scene_id = self.scene_id.replace('/', '_')
+        tiles = []
+        
+        # First person RGB, depth and third person views (sensor images are RGBA)
+        for uuid, title, prefix in (
+            ("color_sensor", "First Person View (RGB)", "first_person_rgb"),
+            ("depth_sensor", "Depth View", "depth_view"),
+            ("third_person_sensor", "Third Person View", "third_person_view"),
+        ):
+            image = observations.get(uuid)
+            if image is None:
+                tiles.append(_mosaic_tile(None, title))
+                continue
+            if uuid == "depth_sensor":
+                depth_8u = cv2.normalize(image, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+                bgr = cv2.applyColorMap(depth_8u, cv2.COLORMAP_VIRIDIS)
+            else:
+                bgr = cv2.cvtColor(image, cv2.COLOR_RGBA2BGR if image.shape[2] == 4 else cv2.COLOR_RGB2BGR)
+            if save_images:
+                cv2.imwrite(f"{prefix}_{safe_scene_id}.png", bgr)
+            tiles.append(_mosaic_tile(bgr, title))
+        
+        # Topdown map
+        topdown_map = self.get_topdown_map()
+        topdown_bgr = None
+        if topdown_map.size > 0:
+            topdown_bgr = cv2.cvtColor(topdown_map, cv2.COLOR_RGB2BGR)
+            if save_images:
+                cv2.imwrite(f"topdown_map_{safe_scene_id}.png", topdown_bgr)
+        tiles.append(_mosaic_tile(topdown_bgr, "Topdown Map"))
+        
+        mosaic = np.vstack([np.hstack(tiles[:2]), np.hstack(tiles[2:])])
+        try:
+            cv2.imshow(MOSAIC_WINDOW, mosaic)
+        except cv2.error as e:
+            print(f"Warning: could not open a display window: {e}")
+            return
+        # Block like plt.show() so the window keeps handling events; the prompt
+        # would otherwise leave it frozen until the next waitKey call
+        print("Press any key in the view window to continue")
+        cv2.waitKey(0)
+        cv2.destroyWindow(MOSAIC_WINDOW)
+    
+    def _display_observations_matplotlib(self, observations: Dict[str, np.ndarray], save_images: bool):
+        """Show the four views in a matplotlib figure"""
         # Create figure with subplots
         fig, axes = plt.subplots(2, 2, figsize=(12, 10))
         fig.suptitle(f"Current View - Scene: {self.scene_id}", fontsize=16)
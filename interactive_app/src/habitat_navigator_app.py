@@ -222,6 +222,21 @@ class HabitatSimulator:
             font_medium = ImageFont.load_default()
             font_small = ImageFont.load_default()
         
+        # 文字尺寸测量：只判断一次Pillow版本，相同文字（X、Z轴上重复的刻度值）只测量一次
+        text_sizes = {}
+        
+        def measure_text(text, font):
+            key = (text, id(font))
+            size = text_sizes.get(key)
+            if size is None:
+                if hasattr(draw, 'textbbox'):
+                    bbox = draw.textbbox((0, 0), text, font=font)
+                    size = (bbox[2] - bbox[0], bbox[3] - bbox[1])
+                else:
+                    size = draw.textsize(text, font=font)
+                text_sizes[key] = size
+            return size
+        
         # 颜色定义
         grid_color = (100, 100, 100)     # 深灰色网格线
         major_grid_color = (150, 150, 150)  # 主网格线（稍亮）
@@ -289,11 +304,7 @@ class HabitatSimulator:
                 
                 # 绘制X轴标签
                 label_text = f"{x_current:.1f}"
-                try:
-                    bbox = draw.textbbox((0, 0), label_text, font=font_medium)
-                    text_width = bbox[2] - bbox[0]
-                except AttributeError:
-                    text_width, _ = draw.textsize(label_text, font=font_medium)
+                text_width, _ = measure_text(label_text, font_medium)
                 
                 # 底部标签
                 label_x = x_pixel_on_canvas - text_width / 2
@@ -340,12 +351,7 @@ class HabitatSimulator:
                 
                 # 绘制Z轴标签
                 label_text = f"{z_current:.1f}"
-                try:
-                    bbox = draw.textbbox((0, 0), label_text, font=font_medium)
-                    text_width = bbox[2] - bbox[0]
-                    text_height = bbox[3] - bbox[1]
-                except AttributeError:
-                    text_width, text_height = draw.textsize(label_text, font=font_medium)
+                text_width, text_height = measure_text(label_text, font_medium)
                 
                 # 左侧标签
                 label_x = img_area_x0 - tick_length - text_width - 5
@@ -366,11 +372,7 @@ class HabitatSimulator:
         # 添加坐标轴标签
         # X轴标签（底部中央）
         x_label = "X (meters)"
-        try:
-            bbox = draw.textbbox((0, 0), x_label, font=font_large)
-            x_label_width = bbox[2] - bbox[0]
-        except AttributeError:
-            x_label_width, _ = draw.textsize(x_label, font=font_large)
+        x_label_width, _ = measure_text(x_label, font_large)
         
         x_label_x = (new_width - x_label_width) / 2
         x_label_y = new_height - 25
@@ -1125,10 +1127,10 @@ class HabitatNavigatorApp(QMainWindow):
                 angle = math.atan2(direction[0], direction[2])  # 使用+Z计算，然后旋转180度
                 angle += math.pi  # 加180度修正
                 
-                # 创建朝向目标的旋转四元数
-                rotation = mn.Quaternion.rotation(mn.Rad(angle), mn.Vector3.y_axis())
-                self.animation_end_rotation = np.array([rotation.vector.x, rotation.vector.y, 
-                                                      rotation.vector.z, rotation.scalar], dtype=np.float32)
+                # 创建朝向目标的旋转四元数（绕Y轴旋转，直接用标量三角函数计算）
+                half = angle * 0.5
+                self.animation_end_rotation = np.array([0.0, math.sin(half), 0.0, math.cos(half)],
+                                                       dtype=np.float32)
             else:
                 self.animation_end_rotation = np.array([0, 0, 0, 1], dtype=np.float32)
             
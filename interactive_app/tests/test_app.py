@@ -65,8 +65,9 @@ def test_scene_file():
             if os.path.exists(path):
                 print(f"找到目录: {path}")
                 try:
-                    files = os.listdir(path)
-                    glb_files = [f for f in files if f.endswith('.glb')]
+                    with os.scandir(path) as entries:
+                        glb_files = [entry.name for entry in entries
+                                     if entry.name.endswith('.glb') and entry.is_file()]
                     if glb_files:
                         print(f"发现.glb文件: {glb_files}")
                         return os.path.join(path, glb_files[0])
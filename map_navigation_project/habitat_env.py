@@ -29,6 +29,13 @@ os.environ["MAGNUM_LOG"] = "quiet"
 os.environ["HABITAT_SIM_LOG"] = "quiet"
 logging.getLogger("habitat").setLevel(logging.WARNING)
 
+# RGB color for each top-down map cell class; the table covers every uint8
+# value, so no map cell can index outside it
+TOP_DOWN_MAP_COLORS = np.zeros((256, 3), dtype=np.uint8)
+TOP_DOWN_MAP_COLORS[0] = [255, 255, 255]  # Navigable -> White
+TOP_DOWN_MAP_COLORS[1] = [128, 128, 128]  # Non-navigable -> Gray
+TOP_DOWN_MAP_COLORS[2] = [0, 0, 0]        # Border -> Black
+
 
 class HabitatEnvironment:
     """
@@ -62,6 +69,7 @@ class HabitatEnvironment:
         self.current_position: Optional[np.ndarray] = None
         self.current_rotation: Optional[np.ndarray] = None
         self.map_info: Optional[Dict] = None
+        self._base_colored_map: Optional[np.ndarray] = None
         self.step_count = 0
         
         # Camera control (pitch angle for look up/down)
@@ -119,6 +127,9 @@ class HabitatEnvironment:
         top_down_map = maps.get_topdown_map_from_sim(
             self.env.sim, map_resolution=1024
         )
+        # The scene map does not change while the agent moves; keep the
+        # recolored version for get_top_down_map instead of regenerating it
+        self._base_colored_map = self._recolor_top_down_map(top_down_map)
         
         # Get map boundaries from the simulator
         bounds = self.env.sim.pathfinder.get_bounds()
@@ -143,6 +154,16 @@ class HabitatEnvironment:
         # Use the same scale for both dimensions to maintain aspect ratio
         self.map_info['map_scale'] = max(scale_x, scale_z)
         
+        # Affine world <-> map transform, precomputed so each conversion is a
+        # subtraction and a multiply per axis (map Y-axis is inverted)
+        self._map_height = float(map_height)
+        self._x_off = float(bounds[0][0])
+        self._z_off = float(bounds[0][2])
+        self._x_scale = map_width / float(world_width)
+        self._z_scale = map_height / float(world_height)
+        self._inv_x_scale = 1.0 / self._x_scale
+        self._inv_z_scale = 1.0 / self._z_scale
+        
         print(f"Map initialized: size={self.map_info['map_size']}, "
               f"world_bounds={bounds}, scale={self.map_info['map_scale']:.4f}")
     
@@ -159,25 +180,34 @@ class HabitatEnvironment:
         if not self.map_info:
             raise RuntimeError("Map info not initialized")
         
-        bounds = self.map_info['world_bounds']
-        map_size = self.map_info['map_size']
-        scale = self.map_info['map_scale']
-        
         # Convert world coordinates to map pixel coordinates
         # Note: In Habitat, X is right, Z is forward, Y is up
         # In map, we typically use X as horizontal, Y as vertical
-        
-        # Normalize to [0, 1] range
-        norm_x = (world_pos[0] - bounds[0][0]) / (bounds[1][0] - bounds[0][0])
-        norm_z = (world_pos[2] - bounds[0][2]) / (bounds[1][2] - bounds[0][2])
-        
-        # Convert to map coordinates
         # Note: Map Y-axis is typically inverted (0 at top)
-        map_x = norm_x * map_size[1]
-        map_y = (1.0 - norm_z) * map_size[0]  # Invert Y-axis
+        map_x = (world_pos[0] - self._x_off) * self._x_scale
+        map_y = self._map_height - (world_pos[2] - self._z_off) * self._z_scale
         
         return map_x, map_y
     
+    def world_to_map_coordinates_batch(self, world_positions: np.ndarray) -> np.ndarray:
+        """
+        Convert N 3D world positions to 2D map coordinates at once.
+        
+        Args:
+            world_positions: Array of shape (N, 3) with world coordinates [x, y, z]
+            
+        Returns:
+            np.ndarray: Array of shape (N, 2) with map coordinates (x_map, y_map)
+        """
+        if not self.map_info:
+            raise RuntimeError("Map info not initialized")
+        
+        world_positions = np.asarray(world_positions, dtype=np.float64)
+        map_coords = np.empty((world_positions.shape[0], 2), dtype=np.float64)
+        map_coords[:, 0] = (world_positions[:, 0] - self._x_off) * self._x_scale
+        map_coords[:, 1] = self._map_height - (world_positions[:, 2] - self._z_off) * self._z_scale
+        return map_coords
+    
     def map_to_world_coordinates(self, map_x: float, map_y: float) -> np.ndarray:
         """
         Convert 2D map coordinates to 3D world coordinates.
@@ -192,16 +222,9 @@ class HabitatEnvironment:
         if not self.map_info:
             raise RuntimeError("Map info not initialized")
         
-        bounds = self.map_info['world_bounds']
-        map_size = self.map_info['map_size']
-        
-        # Normalize map coordinates to [0, 1]
-        norm_x = map_x / map_size[1]
-        norm_z = 1.0 - (map_y / map_size[0])  # Invert Y-axis
-        
-        # Convert to world coordinates
-        world_x = bounds[0][0] + norm_x * (bounds[1][0] - bounds[0][0])
-        world_z = bounds[0][2] + norm_z * (bounds[1][2] - bounds[0][2])
+        # Convert to world coordinates (invert Y-axis)
+        world_x = self._x_off + map_x * self._inv_x_scale
+        world_z = self._z_off + (self._map_height - map_y) * self._inv_z_scale
         
         # Get the appropriate Y (height) for this position
         world_y = self._get_navigable_height(world_x, world_z)
@@ -224,21 +247,16 @@ class HabitatEnvironment:
         
         # Use pathfinder to get the floor height at this position
         try:
-            # Try to snap to navigable surface
+            # Snap to the nearest navigable surface; snap_point already returns a
+            # navmesh point, or NaN components if there is none
             test_point = np.array([x, 0.0, z])
             snapped_point = self.env.sim.pathfinder.snap_point(test_point)
             
-            if self.env.sim.pathfinder.is_navigable(snapped_point):
-                return snapped_point[1]
-            else:
-                # If not navigable, try different heights
-                for height in [0.0, 0.1, 0.2, 0.5, 1.0]:
-                    test_point = np.array([x, height, z])
-                    if self.env.sim.pathfinder.is_navigable(test_point):
-                        return height
-                
-                # If still not navigable, return current agent height
-                return self.current_position[1] if self.current_position is not None else 0.0
+            if np.isfinite(snapped_point[1]):
+                return float(snapped_point[1])
+            
+            # If not navigable, return current agent height
+            return self.current_position[1] if self.current_position is not None else 0.0
         except:
             # Fallback to current agent height
             return self.current_position[1] if self.current_position is not None else 0.0
@@ -428,32 +446,34 @@ class HabitatEnvironment:
             return None
         
         try:
-            # Get colorized top-down map from simulator
-            top_down_map = maps.get_topdown_map_from_sim(
-                self.env.sim, map_resolution=1024
-            )
+            if self._base_colored_map is None:
+                # Get colorized top-down map from simulator
+                top_down_map = maps.get_topdown_map_from_sim(
+                    self.env.sim, map_resolution=1024
+                )
+                self._base_colored_map = self._recolor_top_down_map(top_down_map)
             
-            # Convert to RGB format for visualization
-            if len(top_down_map.shape) == 2:
-                # If grayscale, convert to RGB
-                recolor_map = np.array([
-                    [255, 255, 255],  # Navigable -> White
-                    [128, 128, 128],  # Non-navigable -> Gray  
-                    [0, 0, 0]         # Border -> Black
-                ], dtype=np.uint8)
-                top_down_map = recolor_map[top_down_map]
-            
-            return top_down_map
+            # Copy so callers can draw on the map without touching the cache
+            return self._base_colored_map.copy()
             
         except Exception as e:
             print(f"Error getting top-down map: {e}")
             return None
     
+    @staticmethod
+    def _recolor_top_down_map(top_down_map: np.ndarray) -> np.ndarray:
+        """Convert a top-down map of cell classes to RGB format for visualization."""
+        if len(top_down_map.shape) == 2:
+            # If grayscale, convert to RGB with one contiguous table gather
+            top_down_map = np.take(TOP_DOWN_MAP_COLORS, top_down_map, axis=0)
+        return top_down_map
+    
     def cleanup(self):
         """Clean up the environment resources."""
         if self.env:
             self.env.close()
             self.env = None
+        self._base_colored_map = None
         print("Environment cleaned up")
     
     def __del__(self):
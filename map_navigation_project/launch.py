@@ -8,18 +8,23 @@ with different configurations and scenes.
 
 import os
 import sys
-import argparse
-from pathlib import Path
+import functools
 
-# Add the current directory to Python path
-current_dir = Path(__file__).parent.absolute()
-sys.path.insert(0, str(current_dir))
+# Project directory; configuration and output paths are resolved against it
+current_dir = os.path.dirname(os.path.abspath(__file__))
 
-from main_controller import NavigationController
+RULE = "=" * 60
+BANNER = "\n".join([RULE, "HABITAT MAP NAVIGATION SYSTEM LAUNCHER", RULE])
+# Decorative output is only printed to an interactive terminal, not to logs
+INTERACTIVE = sys.stdout.isatty()
 
 
-def main():
-    """Main launcher function."""
+@functools.lru_cache(maxsize=1)
+def build_parser():
+    """Build the command line parser once; repeated main() calls reuse it."""
+    # Only needed when run as a script, not when this module is imported
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description="Launch Habitat Map Navigation System",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -55,39 +60,50 @@ Examples:
         help='Enable verbose output'
     )
     
-    args = parser.parse_args()
+    return parser
+
+
+def main():
+    """Main launcher function."""
+    args = build_parser().parse_args()
     
     # Resolve paths
-    config_path = Path(args.config)
-    if not config_path.is_absolute():
-        config_path = current_dir / config_path
-    
-    output_dir = Path(args.output)
-    if not output_dir.is_absolute():
-        output_dir = current_dir / output_dir
+    # Relative paths are resolved against the project directory; os.path.join
+    # keeps absolute paths unchanged
+    config_path = os.path.join(current_dir, args.config)
+    output_dir = os.path.join(current_dir, args.output)
     
     # Check if config file exists
-    if not config_path.exists():
+    if not os.path.isfile(config_path):
         print(f"Error: Configuration file not found: {config_path}")
         print("Please check the path or create the configuration file.")
         return 1
     
-    # Print startup information
-    print("="*60)
-    print("HABITAT MAP NAVIGATION SYSTEM LAUNCHER")
-    print("="*60)
+    # Print startup information as a single write
+    lines = [BANNER] if INTERACTIVE else []
     if args.verbose:
-        print(f"Configuration: {config_path}")
-        print(f"Output Directory: {output_dir}")
-        print(f"Scene Override: {args.scene or 'None (using config)'}")
-        print("-"*60)
+        lines += [
+            f"Configuration: {config_path}",
+            f"Output Directory: {output_dir}",
+            f"Scene Override: {args.scene or 'None (using config)'}",
+        ]
+        if INTERACTIVE:
+            lines.append("-"*60)
+    if lines:
+        print("\n".join(lines))
     
     try:
+        # Imported here so --help and configuration errors return without
+        # loading habitat-sim and habitat-lab
+        if current_dir not in sys.path:
+            sys.path.insert(0, current_dir)
+        from main_controller import NavigationController
+        
         # Initialize controller
         print("Initializing navigation controller...")
         controller = NavigationController(
-            config_path=str(config_path),
-            output_dir=str(output_dir),
+            config_path=config_path,
+            output_dir=output_dir,
             scene_id=args.scene
         )
         
@@ -108,6 +124,13 @@ Examples:
     except KeyboardInterrupt:
         print("\nReceived interrupt signal. Shutting down...")
     
+    except ImportError:
+        # Missing dependency (usually habitat-sim or habitat-lab): one traceback
+        # to stderr names the module and where it was imported from
+        import traceback
+        traceback.print_exc()
+        return 1
+    
     except Exception as e:
         print(f"ERROR: {e}")
         if args.verbose:
@@ -10,6 +10,7 @@ import os
 import sys
 import re
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, Tuple
 import cv2
 
@@ -17,6 +18,15 @@ import cv2
 from habitat_env import HabitatEnvironment
 from map_visualizer import MapVisualizer, create_third_person_view
 
+# Directory containing this module; default config and output paths are relative to it
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _to_bgr(image: np.ndarray) -> np.ndarray:
+    """Convert an RGB or RGBA sensor image to BGR for cv2.imwrite in one pass."""
+    code = cv2.COLOR_RGBA2BGR if image.shape[2] == 4 else cv2.COLOR_RGB2BGR
+    return cv2.cvtColor(image, code)
+
 
 class NavigationController:
     """
@@ -29,6 +39,15 @@ class NavigationController:
     - Interactive command loop
     """
     
+    # Command patterns, compiled once
+    MOVE_PATTERN = re.compile(r"move\s+(-?\d+\.?\d*)\s+(-?\d+\.?\d*)")
+    TURN_PATTERN = re.compile(r"turn\s+(left|right)\s+(-?\d+\.?\d*)")
+    LOOK_PATTERN = re.compile(r"look\s+(up|down)\s+(-?\d+\.?\d*)")
+    
+    # PNG deflate level for view images; level 1 encodes faster
+    # than OpenCV's default of 3 for a slightly larger file
+    PNG_WRITE_PARAMS = [cv2.IMWRITE_PNG_COMPRESSION, 1]
+    
     def __init__(self, config_path: str, output_dir: str = "output_images", scene_id: str = None):
         """
         Initialize the navigation controller.
@@ -50,6 +69,10 @@ class NavigationController:
         self.step_count = 0
         self.is_initialized = False
         
+        # View images are encoded and written in the background so that the
+        # command loop does not wait for PNG compression
+        self._io_pool = ThreadPoolExecutor(max_workers=2)
+        
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
         
@@ -97,6 +120,30 @@ class NavigationController:
             print(f"Error during initialization: {e}")
             return False
     
+    def _write_image(self, filename: str, bgr_image: np.ndarray, label: str):
+        """
+        Queue a BGR image to be written as PNG on the I/O thread pool.
+        
+        The image must not be modified afterwards; callers pass a freshly
+        converted array. Returns the future of the write, whose result is
+        True if the image was saved.
+        """
+        return self._io_pool.submit(self._save_png, filename, bgr_image, label)
+    
+    @classmethod
+    def _save_png(cls, filename: str, bgr_image: np.ndarray, label: str) -> bool:
+        """Write a BGR image to disk and report whether it was saved."""
+        try:
+            written = cv2.imwrite(filename, bgr_image, cls.PNG_WRITE_PARAMS)
+        except cv2.error as e:
+            print(f"Error: could not write {label} {filename}: {e}")
+            return False
+        if not written:
+            print(f"Error: could not write {label} {filename}")
+            return False
+        print(f"Saved {label}: {filename}")
+        return True
+    
     def _generate_images(self, prefix: str) -> bool:
         """
         Generate and save the current set of images (FPV, TPV, Map).
@@ -123,15 +170,17 @@ class NavigationController:
             
             if observations:
                 if 'rgb' in observations:
+                    # Kept in RGB(A); converted to BGR only when written with OpenCV
                     rgb_image = observations['rgb']
-                    # Convert from RGB to BGR for OpenCV compatibility
-                    rgb_image = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2BGR)
                 
                 if 'depth' in observations:
                     depth_image = observations['depth']
                     if len(depth_image.shape) == 3:
                         depth_image = depth_image[:, :, 0]  # Take first channel if multi-channel
             
+            # PNG writes queued on the I/O pool; checked before returning
+            pending_writes = []
+            
             # Generate image filenames
             fpv_filename = os.path.join(self.output_dir, f"{prefix}_fpv.png")
             tpv_filename = os.path.join(self.output_dir, f"{prefix}_tpv.png")
@@ -140,20 +189,23 @@ class NavigationController:
             
             # Save first-person view
             if rgb_image is not None:
-                cv2.imwrite(fpv_filename, rgb_image)
-                print(f"Saved first-person view: {fpv_filename}")
+                pending_writes.append(
+                    self._write_image(fpv_filename, _to_bgr(rgb_image), "first-person view"))
             else:
                 print("No RGB image available for first-person view")
             
             # Create and save third-person view (simulated)
             if rgb_image is not None:
+                # The BGR conversion is already a private copy, so the overlay is drawn
+                # on it in place; the overlay is white and looks the same in BGR
                 tpv_image = create_third_person_view(
                     agent_state['position'], 
-                    cv2.cvtColor(rgb_image, cv2.COLOR_BGR2RGB),  # Convert back to RGB
-                    self.habitat_env.map_info['world_bounds']
+                    _to_bgr(rgb_image),
+                    self.habitat_env.map_info['world_bounds'],
+                    inplace=True
                 )
-                cv2.imwrite(tpv_filename, cv2.cvtColor(tpv_image, cv2.COLOR_RGB2BGR))
-                print(f"Saved third-person view: {tpv_filename}")
+                pending_writes.append(
+                    self._write_image(tpv_filename, tpv_image, "third-person view"))
             
             # Generate and save map view
             map_title = f"Navigation Map - Step {self.step_count}"
@@ -162,15 +214,15 @@ class NavigationController:
             
             # Generate composite view
             composite_title = f"Navigation View - Step {self.step_count}"
-            rgb_for_composite = cv2.cvtColor(rgb_image, cv2.COLOR_BGR2RGB) if rgb_image is not None else None
-            
             if self.map_visualizer.generate_comparative_view(
-                agent_state, rgb_for_composite, depth_image, 
+                agent_state, rgb_image, depth_image, 
                 composite_filename, composite_title
             ):
                 print(f"Saved composite view: {composite_filename}")
             
-            return True
+            # Wait for the queued writes (they overlap the map rendering above)
+            # and report failure if any of them could not be saved
+            return all([write.result() for write in pending_writes])
             
         except Exception as e:
             print(f"Error generating images: {e}")
@@ -187,8 +239,7 @@ class NavigationController:
             Optional[Tuple[float, float]]: Parsed coordinates or None if invalid
         """
         # Match pattern: move <x> <y>
-        pattern = r"move\s+(-?\d+\.?\d*)\s+(-?\d+\.?\d*)"
-        match = re.match(pattern, command.strip().lower())
+        match = self.MOVE_PATTERN.match(command.strip().lower())
         
         if match:
             try:
@@ -211,8 +262,7 @@ class NavigationController:
             Optional[Tuple[str, float]]: (direction, degrees) or None if invalid
         """
         # Match pattern: turn <left|right> <degrees>
-        pattern = r"turn\s+(left|right)\s+(-?\d+\.?\d*)"
-        match = re.match(pattern, command.strip().lower())
+        match = self.TURN_PATTERN.match(command.strip().lower())
         
         if match:
             try:
@@ -235,8 +285,7 @@ class NavigationController:
             Optional[Tuple[str, float]]: (direction, degrees) or None if invalid
         """
         # Match pattern: look <up|down> <degrees>
-        pattern = r"look\s+(up|down)\s+(-?\d+\.?\d*)"
-        match = re.match(pattern, command.strip().lower())
+        match = self.LOOK_PATTERN.match(command.strip().lower())
         
         if match:
             try:
@@ -350,6 +399,36 @@ class NavigationController:
             print(f"Error executing look command: {e}")
             return False
     
+    def _handle_move_command(self, command: str):
+        """Parse and execute a 'move' command line, printing usage if it is invalid."""
+        coords = self._parse_move_command(command)
+        if coords:
+            map_x, map_y = coords
+            self._execute_move_command(map_x, map_y)
+        else:
+            print("Invalid move command. Usage: move <x> <y>")
+            print("Example: move 5.2 -3.8")
+    
+    def _handle_turn_command(self, command: str):
+        """Parse and execute a 'turn' command line, printing usage if it is invalid."""
+        turn_params = self._parse_turn_command(command)
+        if turn_params:
+            direction, degrees = turn_params
+            self._execute_turn_command(direction, degrees)
+        else:
+            print("Invalid turn command. Usage: turn <left|right> <degrees>")
+            print("Example: turn right 45")
+    
+    def _handle_look_command(self, command: str):
+        """Parse and execute a 'look' command line, printing usage if it is invalid."""
+        look_params = self._parse_look_command(command)
+        if look_params:
+            direction, degrees = look_params
+            self._execute_look_command(direction, degrees)
+        else:
+            print("Invalid look command. Usage: look <up|down> <degrees>")
+            print("Example: look up 30")
+    
     def print_help(self):
         """Print available commands and usage instructions."""
         help_text = """
@@ -412,6 +491,14 @@ Current Status:
             print(f"  Yaw: {agent_state['yaw_degrees']:.1f}°")
             print(f"  Images saved with prefix 'init'")
         
+        # Command keyword -> handler taking the full command line
+        handlers = {
+            'help': lambda command: self.print_help(),
+            'move': self._handle_move_command,
+            'turn': self._handle_turn_command,
+            'look': self._handle_look_command,
+        }
+        
         while True:
             try:
                 # Get user input
@@ -420,41 +507,15 @@ Current Status:
                 if not command:
                     continue
                 
-                # Parse and execute commands
-                if command.lower() in ['quit', 'exit']:
+                # Parse and execute commands, dispatching on the first word
+                keyword = command.split(None, 1)[0].lower()
+                if keyword in ('quit', 'exit'):
                     print("Exiting navigation system...")
                     break
                 
-                elif command.lower() == 'help':
-                    self.print_help()
-                
-                elif command.lower().startswith('move'):
-                    coords = self._parse_move_command(command)
-                    if coords:
-                        map_x, map_y = coords
-                        self._execute_move_command(map_x, map_y)
-                    else:
-                        print("Invalid move command. Usage: move <x> <y>")
-                        print("Example: move 5.2 -3.8")
-                
-                elif command.lower().startswith('turn'):
-                    turn_params = self._parse_turn_command(command)
-                    if turn_params:
-                        direction, degrees = turn_params
-                        self._execute_turn_command(direction, degrees)
-                    else:
-                        print("Invalid turn command. Usage: turn <left|right> <degrees>")
-                        print("Example: turn right 45")
-                
-                elif command.lower().startswith('look'):
-                    look_params = self._parse_look_command(command)
-                    if look_params:
-                        direction, degrees = look_params
-                        self._execute_look_command(direction, degrees)
-                    else:
-                        print("Invalid look command. Usage: look <up|down> <degrees>")
-                        print("Example: look up 30")
-                
+                handler = handlers.get(keyword)
+                if handler:
+                    handler(command)
                 else:
                     print(f"Unknown command: {command}")
                     print("Type 'help' for available commands.")
@@ -467,6 +528,8 @@ Current Status:
     
     def cleanup(self):
         """Clean up resources."""
+        # Finish writing any queued images
+        self._io_pool.shutdown(wait=True)
         if self.habitat_env:
             self.habitat_env.cleanup()
         print("Navigation controller cleaned up")
@@ -483,8 +546,8 @@ def main():
     This function can be used for testing or as a standalone entry point.
     """
     # Configuration
-    config_path = os.path.join(os.path.dirname(__file__), "configs", "navigation_config.yaml")
-    output_dir = os.path.join(os.path.dirname(__file__), "output_images")
+    config_path = os.path.join(PROJECT_DIR, "configs", "navigation_config.yaml")
+    output_dir = os.path.join(PROJECT_DIR, "output_images")
     
     # You can specify a different scene here
     scene_id = None  # Use default from config, or specify like "17DRP5sb8fy"
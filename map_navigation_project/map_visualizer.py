@@ -73,15 +73,17 @@ class MapVisualizer:
         x_positions = np.arange(0, width, self.grid_spacing_pixels)
         y_positions = np.arange(0, height, self.grid_spacing_pixels)
         
-        # Draw vertical grid lines
-        for x in x_positions:
-            ax.axvline(x=x, color=self.grid_color, linewidth=self.grid_linewidth, 
-                      alpha=self.grid_alpha, linestyle='-')
+        # Draw all vertical grid lines as one LineCollection. The blended transform
+        # keeps x in data coordinates and spans the full axes height, like axvline,
+        # without creating one Line2D artist per line.
+        ax.vlines(x_positions, 0, 1, transform=ax.get_xaxis_transform(),
+                  colors=self.grid_color, linewidth=self.grid_linewidth,
+                  alpha=self.grid_alpha, linestyles='-')
         
-        # Draw horizontal grid lines
-        for y in y_positions:
-            ax.axhline(y=y, color=self.grid_color, linewidth=self.grid_linewidth,
-                      alpha=self.grid_alpha, linestyle='-')
+        # Draw all horizontal grid lines as one LineCollection (full axes width)
+        ax.hlines(y_positions, 0, 1, transform=ax.get_yaxis_transform(),
+                  colors=self.grid_color, linewidth=self.grid_linewidth,
+                  alpha=self.grid_alpha, linestyles='-')
         
         # Add coordinate labels
         self._add_coordinate_labels(ax, x_positions, y_positions)
@@ -372,7 +374,7 @@ class MapVisualizer:
 
 
 def create_third_person_view(agent_pos: np.ndarray, rgb_image: np.ndarray, 
-                           scene_bounds: np.ndarray) -> np.ndarray:
+                           scene_bounds: np.ndarray, inplace: bool = False) -> np.ndarray:
     """
     Create a simulated third-person view of the agent.
     
@@ -384,6 +386,8 @@ def create_third_person_view(agent_pos: np.ndarray, rgb_image: np.ndarray,
         agent_pos: Agent 3D position
         rgb_image: First-person RGB image
         scene_bounds: Scene boundary information
+        inplace: Draw the overlay directly on rgb_image instead of a copy.
+            Only for callers that own the image buffer.
         
     Returns:
         np.ndarray: Third-person view image
@@ -392,8 +396,8 @@ def create_third_person_view(agent_pos: np.ndarray, rgb_image: np.ndarray,
     if rgb_image is None:
         return np.zeros((480, 640, 3), dtype=np.uint8)
     
-    # Create a copy of the RGB image
-    tpv_image = rgb_image.copy()
+    # Create a copy of the RGB image unless the caller hands over its buffer
+    tpv_image = rgb_image if inplace else rgb_image.copy()
     
     # Add simple overlay text to indicate this is a "third-person" view
     cv2.putText(tpv_image, "Third-Person View (Simulated)", 
@@ -9,9 +9,24 @@ everything is properly set up before running the navigation system.
 import os
 import sys
 import importlib
+import itertools
 from pathlib import Path
 
 
+def count_entries(path, cap=None):
+    """Count the entries of directory path, stopping once cap entries are seen.
+
+    Existence and contents come from a single scandir handle, so there is no
+    separate stat that could disagree with the listing. A missing path counts
+    as empty; count_entries(path, cap=1) is a cheap non-emptiness check.
+    """
+    try:
+        with os.scandir(path) as it:
+            return sum(1 for _ in itertools.islice(it, cap))
+    except (FileNotFoundError, NotADirectoryError):
+        return 0
+
+
 class SystemVerifier:
     """System verification utility class."""
     
@@ -113,16 +128,17 @@ class SystemVerifier:
                 print(f"✓ Found data directory: {data_dir}")
                 data_dir_found = True
                 
-                # Check for scene datasets
+                # Check for scene datasets (an empty directory counts as missing)
                 scene_dir = data_dir / 'scene_datasets'
-                if scene_dir.exists():
-                    print(f"✓ Scene datasets directory found: {scene_dir}")
+                num_datasets = count_entries(scene_dir)
+                if num_datasets:
+                    print(f"✓ Scene datasets directory found: {scene_dir} ({num_datasets} entries)")
                 else:
                     self.warnings.append(f"Scene datasets not found in {scene_dir}")
                 
                 # Check for MP3D
-                mp3d_dir = scene_dir / 'mp3d' if scene_dir.exists() else None
-                if mp3d_dir and mp3d_dir.exists():
+                mp3d_dir = scene_dir / 'mp3d'
+                if num_datasets and count_entries(mp3d_dir, cap=1):
                     print(f"✓ MP3D dataset found: {mp3d_dir}")
                 else:
                     self.warnings.append("MP3D dataset not found. Download with habitat data tools.")
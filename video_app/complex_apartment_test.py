@@ -5,6 +5,7 @@ apartment_1.glb 复杂导航测试脚本
 """
 
 import subprocess
+import sys
 import json
 import time
 import os
@@ -33,7 +34,8 @@ class ApartmentNavigationTester:
         
         try:
             result = subprocess.run(
-                ['python', 'main.py', '--scene', self.scene_path],
+                # 使用当前解释器启动，参数列表不经过shell
+                [sys.executable, 'main.py', '--scene', self.scene_path],
                 input=input_data,
                 text=True,
                 capture_output=True,
@@ -5,30 +5,70 @@
 """
 
 import subprocess
+import sys
 import os
 import time
+import queue
+import threading
 
+# main.py在处理完每条指令序列后输出的哨兵行
+SENTINEL = "__SEQUENCE_DONE__"
+# 每个测试用例的超时（秒）
+TEST_TIMEOUT = 120
 
-def run_test(description, commands, expected_result="success"):
-    """运行一个测试用例"""
+
+def start_generator():
+    """只启动一次主程序（场景和GPU上下文只加载一次），返回 (进程, 输出行队列)"""
+    proc = subprocess.Popen(
+        [sys.executable, 'main.py', '--sentinel', SENTINEL],
+        env={**os.environ, 'PYTHONUNBUFFERED': '1'},
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        cwd='/home/yaoaa/habitat-lab/video_app'
+    )
+    
+    # 后台线程读取输出，主线程按行等待（带超时）
+    lines = queue.Queue()
+    
+    def read_output():
+        for line in proc.stdout:
+            lines.put(line)
+        lines.put(None)
+    
+    threading.Thread(target=read_output, daemon=True).start()
+    return proc, lines
+
+
+def read_until_sentinel(lines, timeout):
+    """读取一条指令序列的全部输出行（不含哨兵行）
+    
+    超时抛出queue.Empty，主程序提前退出时抛出EOFError。
+    """
+    deadline = time.monotonic() + timeout
+    output_lines = []
+    while True:
+        line = lines.get(timeout=max(0.0, deadline - time.monotonic()))
+        if line is None:
+            raise EOFError("main.py exited unexpectedly")
+        if line.rstrip("\n").endswith(SENTINEL):
+            return output_lines
+        output_lines.append(line)
+
+
+def run_test(proc, lines, description, commands, expected_result="success"):
+    """把一个测试用例发送给正在运行的主程序并检查结果"""
     print(f"\n{'='*80}")
     print(f"测试: {description}")
     print(f"命令: {commands}")
     print('='*80)
     
-    input_data = f"{commands}\nexit\n"
-    
     try:
-        result = subprocess.run(
-            ['python', 'main.py'],
-            input=input_data,
-            text=True,
-            capture_output=True,
-            timeout=120,
-            cwd='/home/yaoaa/habitat-lab/video_app'
-        )
-        
-        output_lines = result.stdout.split('\n')
+        proc.stdin.write(f"{commands}\n")
+        proc.stdin.flush()
+        output_lines = read_until_sentinel(lines, TEST_TIMEOUT)
         
         # 提取关键信息
         processing_line = ""
@@ -66,7 +106,7 @@ def run_test(description, commands, expected_result="success"):
             print("  ❌ 结果不符合预期")
             return False
         
-    except subprocess.TimeoutExpired:
+    except queue.Empty:
         print("  ❌ 测试超时")
         return False
     except Exception as e:
@@ -108,13 +148,24 @@ def main():
     success_count = 0
     total_tests = len(test_cases)
     
-    for description, commands, expected in test_cases:
-        success = run_test(description, commands, expected)
-        if success:
-            success_count += 1
+    # 所有用例发送给同一个主程序进程，代理状态在序列之间保持，
+    # 视频文件名带序列编号，不需要等待来避免文件名冲突
+    proc, lines = start_generator()
+    try:
+        for description, commands, expected in test_cases:
+            success = run_test(proc, lines, description, commands, expected)
+            if success:
+                success_count += 1
         
-        # 等待避免文件名冲突
-        time.sleep(2)
+        proc.stdin.write("exit\n")
+        proc.stdin.flush()
+        proc.wait(timeout=60)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"主程序未正常退出: {e}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
     
     print(f"\n{'='*80}")
     print(f"测试总结: {success_count}/{total_tests} 测试通过")
@@ -11,24 +11,37 @@ import json
 from datetime import datetime
 from pathlib import Path
 
-# 添加src路径到Python路径
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+# 添加src路径到Python路径（放在最前面且不重复添加）
+src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
 
 from habitat_video_generator import HabitatVideoGenerator
 
+DEFAULT_SCENE = "/home/yaoaa/habitat-lab/data/scene_datasets/habitat-test-scenes/van-gogh-room.glb"
+# 设置该环境变量时用它作为默认场景（例如预先拷贝到/dev/shm的场景文件）
+SCENE_ENV_VAR = "HAB_SCENE"
+
 
 def parse_args():
     """解析命令行参数"""
     parser = argparse.ArgumentParser(description='Habitat Video Generator')
     parser.add_argument('--scene', 
-                       default="/home/yaoaa/habitat-lab/data/scene_datasets/habitat-test-scenes/van-gogh-room.glb",
-                       help='Path to the .glb scene file')
+                       default=os.environ.get(SCENE_ENV_VAR, DEFAULT_SCENE),
+                       help=f'Path to the .glb scene file (default: ${SCENE_ENV_VAR} or {DEFAULT_SCENE})')
     parser.add_argument('--gpu', type=int, default=0, 
                        help='CUDA device ID (default: 0)')
     parser.add_argument('--fps', type=int, default=30,
                        help='Video frame rate (default: 30)')
     parser.add_argument('--output-dir', default='./outputs',
                        help='Output directory for videos (default: ./outputs)')
+    parser.add_argument('--capture-every', type=int, default=1,
+                       help='Render one frame every N animation steps (default: 1)')
+    parser.add_argument('--coalesce', action='store_true',
+                       help='Merge consecutive same-direction turns and collinear moves before running them')
+    parser.add_argument('--sentinel', default=None,
+                       help='Print this line (and flush stdout) after each processed input, '
+                            'so another process can drive the generator through pipes')
     return parser.parse_args()
 
 
@@ -63,6 +76,37 @@ def validate_command_sequence(commands):
     return True, "Valid"
 
 
+def handle_input(generator, user_input):
+    """解析、验证并执行一条JSON指令序列"""
+    # 解析JSON指令
+    try:
+        commands = json.loads(user_input)
+    except json.JSONDecodeError as e:
+        print(f"ERROR: Invalid JSON format: {e}")
+        return
+    
+    # 验证指令格式
+    is_valid, error_msg = validate_command_sequence(commands)
+    if not is_valid:
+        print(f"ERROR: {error_msg}")
+        return
+    
+    # 处理指令序列
+    print(f"Processing {len(commands)} commands...")
+    
+    try:
+        output_path = generator.process_command_sequence(commands)
+        if output_path:
+            print(f"Video successfully saved to: {output_path}")
+        else:
+            print("No video generated (empty command sequence or all commands failed)")
+            
+    except KeyboardInterrupt:
+        print("\nOperation interrupted by user.")
+    except Exception as e:
+        print(f"ERROR: Failed to process commands: {e}")
+
+
 def main():
     """主函数"""
     args = parse_args()
@@ -77,7 +121,7 @@ def main():
     output_dir.mkdir(exist_ok=True)
     
     print("Habitat Video Generator Initialized.")
-    print("Enter command sequence as a JSON string or 'exit'.")
+    print("Enter command sequence as a JSON string, 'reset' or 'exit'.")
     
     # 初始化视频生成器
     try:
@@ -85,7 +129,9 @@ def main():
             scene_filepath=args.scene,
             gpu_device_id=args.gpu,
             fps=args.fps,
-            output_dir=str(output_dir)
+            output_dir=str(output_dir),
+            capture_every=args.capture_every,
+            coalesce_commands=args.coalesce
         )
         print(f"Scene loaded: {args.scene}")
         print(f"GPU device: {args.gpu}")
@@ -110,35 +156,17 @@ def main():
             if not user_input:
                 continue
             
-            # 解析JSON指令
+            # 处理一条指令序列（或reset）；指定了--sentinel时，无论成功与否都在处理完后输出哨兵行
             try:
-                commands = json.loads(user_input)
-            except json.JSONDecodeError as e:
-                print(f"ERROR: Invalid JSON format: {e}")
-                continue
-            
-            # 验证指令格式
-            is_valid, error_msg = validate_command_sequence(commands)
-            if not is_valid:
-                print(f"ERROR: {error_msg}")
-                continue
-            
-            # 处理指令序列
-            print(f"Processing {len(commands)} commands...")
-            
-            try:
-                output_path = generator.process_command_sequence(commands)
-                if output_path:
-                    print(f"Video successfully saved to: {output_path}")
+                if user_input.lower() == 'reset':
+                    # 下一条指令序列像新启动的程序一样重新初始化代理位置和朝向
+                    generator.reset_agent()
+                    print("Agent reset.")
                 else:
-                    print("No video generated (empty command sequence or all commands failed)")
-                    
-            except KeyboardInterrupt:
-                print("\nOperation interrupted by user.")
-                continue
-            except Exception as e:
-                print(f"ERROR: Failed to process commands: {e}")
-                continue
+                    handle_input(generator, user_input)
+            finally:
+                if args.sentinel:
+                    print(args.sentinel, flush=True)
                 
         except KeyboardInterrupt:
             print("\nShutting down.")
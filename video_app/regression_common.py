@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+回归测试脚本共用的场景、视频质量设置和生成器管理
+（test_apartment_navigation.py、test_complex_navigation.py、test_apartment_advanced.py）
+"""
+
+import sys
+import os
+import contextlib
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# 添加src路径
+src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from habitat_video_generator import HabitatVideoGenerator
+
+# 测试场景所在目录
+SCENE_DIR = "/home/yaoaa/habitat-lab/data/scene_datasets/habitat-test-scenes"
+SCENE_NAME = "apartment_1.glb"
+
+# 回归测试使用的视频质量：降低帧率和渲染分辨率（像素数1/4），缩短渲染和编码时间
+QUALITY = {"fps": 24, "render_scale": 0.5}
+# 执行前合并同向的连续旋转和共线同向的连续移动；不折叠旋转，
+# 环顾（4次左转90度）和左右抵消的转向正是这些脚本要录制的内容
+COALESCE = {"coalesce_commands": True}
+
+
+@functools.lru_cache(maxsize=None)
+def require_scene(name: str = SCENE_NAME) -> str:
+    """解析场景文件路径，只检查一次；文件不存在时抛出FileNotFoundError"""
+    path = os.path.join(SCENE_DIR, name)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Scene file not found: {path}")
+    return path
+
+
+@contextlib.contextmanager
+def regression_generator(generator=None, output_dir: str = "./outputs"):
+    """子测试使用的视频生成器
+
+    generator为None时按回归测试设置创建一个新的生成器，退出时关闭；
+    否则复用共享的生成器：只切换输出目录和帧率，并重置代理（由创建者负责关闭）。
+    """
+    if generator is not None:
+        generator.output_dir = output_dir
+        generator.fps = QUALITY["fps"]
+        generator.reset_agent()
+        yield generator
+        return
+
+    generator = HabitatVideoGenerator(
+        scene_filepath=require_scene(),
+        gpu_device_id=0,
+        output_dir=output_dir,
+        **QUALITY,
+        **COALESCE
+    )
+    try:
+        yield generator
+    finally:
+        generator.close()
+
+
+def run_tests_in_parallel(tests, max_workers=2):
+    """在独立进程中并行运行互不依赖的子测试
+
+    子测试写入不同的输出目录，互不共享状态；一个进程做模拟渲染时另一个可以同时编码。
+    使用spawn启动子进程，避免fork继承父进程的GL/CUDA上下文。
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = {executor.submit(test): test.__name__ for test in tests}
+        for future in as_completed(futures):
+            try:
+                future.result()
+                print(f"子测试完成: {futures[future]}")
+            except Exception as e:
+                print(f"子测试 {futures[future]} 失败: {e}")
@@ -4,7 +4,9 @@
 """
 
 import subprocess
+import sys
 import os
+import threading
 import time
 
 
@@ -17,19 +19,35 @@ def run_command(description, commands_json):
     
     input_data = f"{commands_json}\nexit\n"
     
+    # 逐行读取子进程输出并实时打印关键信息，而不是等进程结束后一次性缓冲全部输出
+    # （-u使子进程的stdout不缓冲，输出能及时到达；使用当前解释器，不经过PATH查找）
+    proc = subprocess.Popen(
+        [sys.executable, '-u', 'main.py'],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        cwd='/home/yaoaa/habitat-lab/video_app'
+    )
+    
+    # 超时后结束子进程，读取循环随之结束
+    timed_out = threading.Event()
+    
+    def kill_on_timeout():
+        timed_out.set()
+        proc.kill()
+    
+    timer = threading.Timer(120, kill_on_timeout)
+    timer.start()
+    
     try:
-        result = subprocess.run(
-            ['python', 'main.py'],
-            input=input_data,
-            text=True,
-            capture_output=True,
-            timeout=120,
-            cwd='/home/yaoaa/habitat-lab/video_app'
-        )
+        proc.stdin.write(input_data)
+        proc.stdin.close()
         
         # 提取关键信息
-        lines = result.stdout.split('\n')
-        for line in lines:
+        for line in proc.stdout:
+            line = line.rstrip('\n')
             if 'Processing' in line or 'Executing command' in line:
                 print(line)
             elif 'Generated' in line and 'frames' in line:
@@ -39,14 +57,19 @@ def run_command(description, commands_json):
             elif 'ERROR:' in line:
                 print(line)
         
-        return result.returncode == 0
+        proc.wait()
+        if timed_out.is_set():
+            print("错误: 命令执行超时")
+            return False
+        return proc.returncode == 0
         
-    except subprocess.TimeoutExpired:
-        print("错误: 命令执行超时")
-        return False
     except Exception as e:
         print(f"错误: {e}")
+        proc.kill()
+        proc.wait()
         return False
+    finally:
+        timer.cancel()
 
 
 def main():
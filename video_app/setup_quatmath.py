@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+编译可选的Cython四元数扩展 _quatmath
+
+用法（在video_app目录下）:
+    python setup_quatmath.py build_ext --build-lib src
+
+未编译时 quat_math.py 会自动回退到NumPy实现。
+"""
+
+from setuptools import Extension, setup
+from Cython.Build import cythonize
+
+extensions = [
+    Extension(
+        "_quatmath",
+        ["src/_quatmath.pyx"],
+        extra_compile_args=["-O3", "-march=native", "-ffast-math"],
+    )
+]
+
+setup(
+    name="habitat-video-quatmath",
+    ext_modules=cythonize(extensions, language_level=3),
+)
@@ -0,0 +1,27 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+四元数辅助函数的Cython实现（可选加速，接口见 quat_math.py）
+
+编译: python setup_quatmath.py build_ext --build-lib src
+"""
+
+from libc.math cimport sin, cos
+
+
+cpdef void quat_mul(const double[::1] a, const double[::1] b, double[::1] out) noexcept:
+    """Hamilton积 out = a * b，四元数顺序 [x, y, z, w]"""
+    cdef double ax = a[0], ay = a[1], az = a[2], aw = a[3]
+    cdef double bx = b[0], by = b[1], bz = b[2], bw = b[3]
+    out[0] = aw * bx + ax * bw + ay * bz - az * by
+    out[1] = aw * by - ax * bz + ay * bw + az * bx
+    out[2] = aw * bz + ax * by - ay * bx + az * bw
+    out[3] = aw * bw - ax * bx - ay * by - az * bz
+
+
+cpdef void quat_from_yaw(double yaw, double[::1] out) noexcept:
+    """绕Y轴旋转yaw弧度的四元数"""
+    cdef double half = 0.5 * yaw
+    out[0] = 0.0
+    out[1] = sin(half)
+    out[2] = 0.0
+    out[3] = cos(half)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+导航指令合并 - 把可以一次执行的连续指令合并，减少逐指令的转向动画和渲染
+纯Python实现，不依赖Habitat，可以单独测试
+"""
+
+import itertools
+import math
+from typing import List, Union
+
+# 合并共线移动指令时，两段方向夹角正弦的阈值
+COLLINEAR_EPS = 1e-6
+# 折叠旋转后，小于该角度（度）的净旋转视为无操作并丢弃
+ROTATION_EPS = 1e-6
+
+
+class ExactCommands(list):
+    """按原样执行的指令列表：不折叠（抵消）旋转指令，用于需要保留每一次转向动画的测试"""
+
+
+def _fold_rotation_runs(commands: List[List[Union[str, float]]]) -> List[List[Union[str, float]]]:
+    """把两条及以上的连续旋转指令折叠为一个带符号的净角度（取模360度），净角度为0时丢弃
+
+    单独的一条旋转指令按原样保留（例如["left", 360]仍然转一整圈）。
+    """
+    folded = []
+    for is_rotation, run in itertools.groupby(commands, key=lambda command: isinstance(command[0], str)):
+        run = list(run)
+        if not is_rotation or len(run) == 1:
+            folded.extend(run)
+            continue
+        # 左转为正、右转为负（与_execute_rotation一致，角度的符号被忽略）
+        net = math.fsum(abs(float(angle)) if direction == "left" else -abs(float(angle))
+                        for direction, angle in run)
+        net = math.fmod(net, 360.0)
+        if abs(net) >= ROTATION_EPS:
+            folded.append(["left" if net > 0 else "right", abs(net)])
+    return folded
+
+
+def coalesce_commands(commands: List[List[Union[str, float]]],
+                      fold_rotations: bool = False) -> List[List[Union[str, float]]]:
+    """合并可以一次执行的连续指令
+
+    - 同一方向的连续旋转指令（角度均为正）合并为一次旋转，角度相加；
+    - fold_rotations为True时，两条及以上的连续旋转指令（不论方向）折叠为一个带符号的净角度，
+      取模360度，净角度为0的旋转直接丢弃（见_fold_rotation_runs）；ExactCommands序列不折叠；
+    - 连续移动指令 A -> B -> C 中，若 B -> C 与 A -> B 共线且同向，则去掉中间点B。
+    第一条移动指令总是保留（可能用于初始化代理位置）。
+    """
+    if fold_rotations and not isinstance(commands, ExactCommands):
+        commands = _fold_rotation_runs(commands)
+    merged = []
+    for command in commands:
+        if merged and isinstance(command[0], str) and isinstance(merged[-1][0], str):
+            prev = merged[-1]
+            if prev[0] == command[0] and float(prev[1]) > 0 and float(command[1]) > 0:
+                merged[-1] = [prev[0], float(prev[1]) + float(command[1])]
+                continue
+        elif (len(merged) > 1 and not isinstance(command[0], str)
+              and not isinstance(merged[-1][0], str) and not isinstance(merged[-2][0], str)):
+            ax, az = float(merged[-2][0]), float(merged[-2][1])
+            bx, bz = float(merged[-1][0]), float(merged[-1][1])
+            cx, cz = float(command[0]), float(command[1])
+            d1x, d1z = bx - ax, bz - az
+            d2x, d2z = cx - bx, cz - bz
+            norms = math.hypot(d1x, d1z) * math.hypot(d2x, d2z)
+            if (norms > 0 and abs(d1x * d2z - d1z * d2x) < COLLINEAR_EPS * norms
+                    and d1x * d2x + d1z * d2z > 0):
+                merged[-1] = list(command)
+                continue
+        merged.append(list(command))
+    return merged
@@ -8,15 +8,18 @@ import sys
 import os
 import math
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont
-from typing import Tuple, List, Optional, Union
+from typing import Tuple, List, NamedTuple, Optional, Union
 import time
-from datetime import datetime
+import itertools
+import contextlib
+import traceback
 import cv2
 
 # 添加interactive_app的src路径以复用代码
-interactive_app_src = os.path.join(os.path.dirname(__file__), '../../interactive_app/src')
-sys.path.insert(0, interactive_app_src)
+interactive_app_src = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                   '../../interactive_app/src'))
+if interactive_app_src not in sys.path:
+    sys.path.insert(0, interactive_app_src)
 
 # Habitat相关导入
 import habitat_sim
@@ -25,37 +28,174 @@ import magnum as mn
 # 复用interactive_app的HabitatSimulator类
 from habitat_navigator_app import HabitatSimulator
 
+# 四元数辅助函数（已编译Cython扩展时自动使用编译版本）
+from quat_math import (quat_forward_xz, quat_from_yaw, quat_from_yaw_batch, quat_mul,
+                       quat_mul_batch, slerp_batch)
+from video_writer import ThreadedVideoWriter, open_video_writer
+from overlays_numba import world_to_map, world_to_map_batch
+from command_coalescing import ExactCommands, coalesce_commands
+
+
+def _resize_interpolation(src_width: int, src_height: int, dst_width: int, dst_height: int) -> int:
+    """缩小时使用INTER_AREA（抗锯齿），放大时使用INTER_LANCZOS4"""
+    if dst_width < src_width or dst_height < src_height:
+        return cv2.INTER_AREA
+    return cv2.INTER_LANCZOS4
+
+
+def _rotation_to_np(rotation) -> np.ndarray:
+    """把各种四元数表示转换为 [x, y, z, w] float32数组
+    
+    热路径传入的都是缓存的numpy数组，先检查该类型，直接返回而不拷贝。
+    """
+    if isinstance(rotation, np.ndarray):
+        return rotation if rotation.dtype == np.float32 else rotation.astype(np.float32)
+    if hasattr(rotation, 'x'):
+        # quaternion.quaternion类型
+        return np.array([rotation.x, rotation.y, rotation.z, rotation.w], dtype=np.float32)
+    return np.array(rotation, dtype=np.float32)
+
+
+# 打包指令中的旋转方向编码（0表示移动指令）
+_TURN_CODES = {"left": 1, "right": -1}
+_TURN_NAMES = {code: name for name, code in _TURN_CODES.items()}
+
+
+class PackedCommands(NamedTuple):
+    """pack_commands打包的指令序列：两个对齐的 (N, 2) float64数组
+    
+    moves: 移动指令的 [x, z]，旋转指令行为NaN；
+    turns: 旋转指令的 [方向编码(左1/右-1), 角度]，移动指令行为0。
+    使用单独的类型而不是普通元组，指令列表写成元组时不会被误认为打包格式。
+    """
+    moves: np.ndarray
+    turns: np.ndarray
+
+
+def pack_commands(commands: List[List[Union[str, float]]]) -> PackedCommands:
+    """把指令列表打包为PackedCommands，process_command_sequence(s)可以直接接受"""
+    moves = np.full((len(commands), 2), np.nan)
+    turns = np.zeros((len(commands), 2))
+    for i, command in enumerate(commands):
+        if isinstance(command[0], str):
+            turns[i] = (_TURN_CODES[command[0]], command[1])
+        else:
+            moves[i] = command
+    return PackedCommands(moves, turns)
+
+
+def unpack_commands(packed: PackedCommands) -> List[List[Union[str, float]]]:
+    """pack_commands的逆操作：一次性把数组转换为Python列表，再组装成指令列表"""
+    is_turn = (packed.turns[:, 0] != 0).tolist()
+    return [[_TURN_NAMES[int(turn[0])], turn[1]] if rotate else move
+            for rotate, move, turn in zip(is_turn, packed.moves.tolist(), packed.turns.tolist())]
+
 
 class HabitatVideoGenerator:
     """Habitat视频生成器"""
     
+    # 判定两帧位姿相同的阈值：位置差（米）和四元数分量的最大差
+    DUPLICATE_POSITION_EPS = 1e-4
+    DUPLICATE_ROTATION_EPS = 1e-6
+    
+    # 代理标记的绘制参数（原始地图像素）
+    AGENT_COLOR = (255, 0, 0)
+    AGENT_DOT_RADIUS = 8
+    ARROW_LENGTH = 20
+    ARROW_HEAD_LENGTH = 10
+    ARROW_HEAD_ANGLE = math.pi * 0.8
+    ARROW_WIDTH = 3
+    ARROW_HEAD_WIDTH = 2
+    AGENT_SPRITE_BINS = 360  # 预绘制标记的朝向数量（1度一个）
+    
+    # render_scale为1时每个面板（FPV和俯视图）的边长
+    PANEL_SIZE = 1024
+    
     def __init__(self, scene_filepath: str, gpu_device_id: int = 0, 
-                 fps: int = 30, output_dir: str = "./outputs"):
+                 fps: int = 30, output_dir: str = "./outputs", capture_every: int = 1,
+                 render_scale: float = 1.0, coalesce_commands: bool = False,
+                 fold_rotations: bool = False):
         self.scene_filepath = scene_filepath
         self.gpu_device_id = gpu_device_id
         self.fps = fps
         self.output_dir = output_dir
+        # FPV渲染分辨率和输出视频尺寸的缩放比例；0.5时像素数为1/4，渲染和编码开销随之下降
+        self.render_scale = float(render_scale)
         
         # 动画参数 - 调整为更慢的速度
         self.rotation_step = 2.0  # 每2度旋转生成一帧（减慢旋转速度）
         self.movement_step = 0.1   # 每0.1米移动生成一帧（减慢移动速度）
         self.interpolation_steps = 30  # 路径段之间的插值步数（来自interactive_app）
+        # 时间下采样：动画循环中每capture_every步才渲染并编码一帧（代理位姿仍逐步更新）
+        self.capture_every = max(1, int(capture_every))
+        # 执行前合并同向的连续旋转指令和共线同向的连续移动指令，减少逐指令的转向动画和渲染；
+        # 默认关闭，按原样执行每条指令
+        self.coalesce_commands = coalesce_commands
+        # 合并时再把两条及以上的连续旋转折叠为一个净角度（模360度），抵消的旋转（如左转4次90度、
+        # 左右各180度）直接丢弃；默认关闭，ExactCommands序列始终不折叠
+        self.fold_rotations = fold_rotations
         
-        # 视频参数 - 提高精度
-        self.video_width = 2048  # 左右各1024 (提高分辨率)
-        self.video_height = 1024
+        # 视频参数 - 默认左右各1024；面板边长取偶数，满足yuv420p编码要求
+        panel_size = max(2, int(self.PANEL_SIZE * self.render_scale) // 2 * 2)
+        self.video_width = 2 * panel_size
+        self.video_height = panel_size
+        self.panel_width = self.video_width // 2
+        
+        # 预分配的左右分屏帧缓冲区，每帧直接写入左右两半，避免PIL往返和重复分配
+        self._frame_buf = np.zeros((self.video_height, self.video_width, 3), dtype=np.uint8)
         
         # 初始化模拟器
         self.simulator = None
-        self.current_frames = []
+        self.frame_count = 0  # 当前序列已写入的帧数
+        self._writer = None  # 当前序列的流式视频写入器（在第一帧时打开）
+        self._output_path = None  # 当前序列的最终视频路径
+        self._seq_counter = itertools.count()  # 序列编号，同一秒内完成的多个序列不会互相覆盖
+        self._session_path = None  # video_session期间所有序列共用的视频路径
+        self.chapters = []  # video_session中每次调用的 (章节名, 起始秒数)
         self.agent_initialized = False  # 标记代理是否已初始化位置
+        # 代理当前位置和旋转的缓存（只通过_move_agent更新，与模拟器保持同步），
+        # 避免每步get_state()和magnum四元数转换
+        self._cur_pos_np = np.zeros(3, dtype=np.float32)
+        self._cur_rot_np = np.array([0, 0, 0, 1], dtype=np.float32)
+        # 上一次完整渲染写入帧缓冲区时的代理位姿，位姿几乎不变时直接重复编码该帧
+        self._last_pose = None
+        self.duplicate_frame_count = 0
         self._initialize_simulator()
         
+        # 缓存基础地图的numpy副本，每帧在其拷贝上用OpenCV绘制代理
+        # 整条管线统一使用uint8 RGB（H, W, 3），避免RGBA带来的额外数据量和逐帧转换
+        if self.simulator.base_map_image.mode != 'RGB':
+            self.simulator.base_map_image = self.simulator.base_map_image.convert('RGB')
+        self._base_map_np = np.ascontiguousarray(np.asarray(self.simulator.base_map_image))
+        if self._base_map_np.dtype != np.uint8 or self._base_map_np.ndim != 3 or self._base_map_np.shape[-1] != 3:
+            raise RuntimeError(f"Base map must be uint8 RGB, got {self._base_map_np.dtype} "
+                               f"with shape {self._base_map_np.shape}")
+        # 持久的工作地图：每帧只从基础地图恢复上一帧代理标记弄脏的区域，而不是拷贝整张地图
+        self._map_work = self._base_map_np.copy()
+        self._map_dirty_box = None
+        
+        # 缓存世界坐标 -> 地图像素坐标的转换参数（与world_to_map_coords一致），供JIT叠加层计算使用
+        padded_height, padded_width = self._base_map_np.shape[:2]
+        self._map_transform = self.simulator.map_transform_params()
+        # 预先绘制各个朝向的代理标记，每帧只需贴图
+        self._build_agent_sprites()
+        
+        # 地图缩放和居中偏移只取决于基础地图尺寸，预先计算一次；
+        # 右半部分的黑色边框在帧缓冲区中保持不变，每帧只覆盖缩放后的地图区域
+        map_width, map_height, x_offset, y_offset = self._letterbox_geometry(
+            padded_width, padded_height, self.video_width - self.panel_width, self.video_height)
+        self._map_size = (map_width, map_height)
+        self._map_interpolation = _resize_interpolation(padded_width, padded_height, map_width, map_height)
+        self._map_dst = self._frame_buf[y_offset:y_offset + map_height,
+                                        self.panel_width + x_offset:self.panel_width + x_offset + map_width]
+        
         # 验证坐标转换精度
         self._verify_coordinate_accuracy()
         
-        print(f"Video generator initialized with {fps} FPS")
+        print(f"Video generator initialized with {fps} FPS, {self.video_width}x{self.video_height}")
         print(f"Animation steps: {self.rotation_step}°/frame, {self.movement_step}m/frame")
+        if self.capture_every > 1:
+            print(f"Capturing every {self.capture_every} animation steps")
         print("Agent will be positioned at the first command location")
     
     def _initialize_simulator(self):
@@ -65,7 +205,8 @@ class HabitatVideoGenerator:
             self.simulator = CustomHabitatSimulator(
                 scene_filepath=self.scene_filepath,
                 gpu_device_id=self.gpu_device_id,
-                resolution=(1024, 1024)  # 提高FPV分辨率
+                # FPV分辨率与左半面板一致，每帧直接拷贝无需缩放
+                resolution=(self.panel_width, self.video_height)
             )
             
             # 不立即设置代理位置，等待第一个指令来决定初始位置
@@ -79,7 +220,7 @@ class HabitatVideoGenerator:
         # 尝试对齐到可导航位置
         navigable_pos = self.simulator.snap_to_navigable(x, z)
         if navigable_pos is not None:
-            self.simulator.move_agent_to(navigable_pos)
+            self._move_agent(navigable_pos)
             print(f"Agent initialized at position ({navigable_pos[0]:.2f}, {navigable_pos[2]:.2f})")
             return True
         else:
@@ -87,76 +228,46 @@ class HabitatVideoGenerator:
             # 尝试找到最近的可导航点
             try:
                 random_point = self.simulator.sim.pathfinder.get_random_navigable_point()
-                self.simulator.move_agent_to(np.array([random_point.x, random_point.y, random_point.z]))
+                self._move_agent(np.array([random_point.x, random_point.y, random_point.z]))
                 print(f"Agent fallback to random navigable position ({random_point.x:.2f}, {random_point.z:.2f})")
                 return True
             except Exception as e:
                 print(f"ERROR: Could not find any navigable position: {e}")
                 return False
     
-    def process_command_sequence(self, commands: List[List[Union[str, float]]]) -> Optional[str]:
-        """处理指令序列并生成视频"""
-        self.current_frames = []
+    def process_command_sequence(self, commands: Union[List[List[Union[str, float]]], PackedCommands],
+                                 chapter: Optional[str] = None) -> Optional[str]:
+        """处理指令序列并生成视频（指令列表，或pack_commands打包的PackedCommands）"""
+        return self.process_command_sequences([commands], chapter=chapter)
+    
+    def process_command_sequences(self, sequences: list, chapter: Optional[str] = None) -> Optional[str]:
+        """依次处理多条指令序列（指令列表或PackedCommands），所有帧编码到同一个视频中
+        
+        编码器只打开和关闭一次，代理状态在序列之间保持。
+        在video_session中调用时帧追加到会话视频，本次调用记为一个章节（chapter为章节名），
+        视频在会话结束时才保存。
+        """
         start_time = time.time()
+        if self._session_path is not None:
+            if chapter is None:
+                chapter = f"{os.path.basename(os.path.normpath(self.output_dir))} #{len(self.chapters) + 1}"
+            self.chapters.append((chapter, self.frame_count / self.fps))
+            return self._append_to_session(sequences, start_time)
+        
+        self.frame_count = 0
+        self.duplicate_frame_count = 0
+        self._writer = None
         
         try:
-            # 如果代理还未初始化位置，使用第一个指令来设置初始位置
-            if not self.agent_initialized and len(commands) > 0:
-                first_command = commands[0]
-                
-                # 检查第一个指令是否是移动指令（包含坐标）
-                if not isinstance(first_command[0], str):
-                    # 第一个指令是移动指令 [x, z]
-                    target_x = float(first_command[0])
-                    target_z = float(first_command[1])
-                    
-                    # 将代理初始化到第一个指令的位置
-                    success = self._reset_agent_to_position(target_x, target_z)
-                    if not success:
-                        print("ERROR: Failed to initialize agent at first command position")
-                        return None
-                    
-                    self.agent_initialized = True
-                    
-                    # 添加初始帧
-                    self._capture_frame()
-                    
-                    # 跳过第一个指令（因为代理已经在目标位置）
-                    commands = commands[1:]
-                    print(f"Agent initialized at first command position ({target_x:.2f}, {target_z:.2f})")
-                else:
-                    # 第一个指令是旋转指令，使用场景中心作为初始位置
-                    center_x = (self.simulator.scene_bounds[0][0] + self.simulator.scene_bounds[1][0]) / 2
-                    center_z = (self.simulator.scene_bounds[0][2] + self.simulator.scene_bounds[1][2]) / 2
-                    
-                    success = self._reset_agent_to_position(center_x, center_z)
-                    if not success:
-                        print("ERROR: Failed to initialize agent at scene center")
-                        return None
-                    
-                    self.agent_initialized = True
-                    
-                    # 添加初始帧
-                    self._capture_frame()
-                    print("Agent initialized at scene center (first command is rotation)")
-            else:
-                # 代理已初始化，直接添加起始帧
-                self._capture_frame()
-            
-            for i, command in enumerate(commands):
-                print(f"  Executing command {i+1}/{len(commands)}: {command}")
-                
-                success = self._execute_command(command)
-                if not success:
-                    print(f"  Command {i+1} failed, stopping sequence")
-                    break
+            self._run_sequences(sequences)
             
             # 如果有帧，生成视频
-            if len(self.current_frames) > 0:
+            if self.frame_count > 0:
                 output_path = self._save_video()
                 
                 execution_time = time.time() - start_time
-                print(f"  Generated {len(self.current_frames)} frames in {execution_time:.2f}s")
+                print(f"  Generated {self.frame_count} frames in {execution_time:.2f}s "
+                      f"({self.duplicate_frame_count} duplicate frames reused)")
                 
                 return output_path
             else:
@@ -166,10 +277,130 @@ class HabitatVideoGenerator:
         except Exception as e:
             print(f"ERROR: Command processing failed: {e}")
             # 即使出错，也尝试保存已有的帧
-            if len(self.current_frames) > 0:
+            if self.frame_count > 0:
                 return self._save_video()
             return None
     
+    def _run_sequences(self, sequences: list):
+        """依次执行多条指令序列并捕获帧"""
+        for index, commands in enumerate(sequences):
+            if len(sequences) > 1:
+                print(f"  Sequence {index+1}/{len(sequences)}")
+            self._run_commands(commands)
+    
+    def _append_to_session(self, sequences: list, start_time: float) -> Optional[str]:
+        """在video_session中执行指令序列，帧追加到会话视频；返回会话视频的路径（尚未保存）"""
+        start_frames = self.frame_count
+        try:
+            self._run_sequences(sequences)
+        except Exception as e:
+            # 已写入的帧留在会话视频中，会话结束时一并保存
+            print(f"ERROR: Command processing failed: {e}")
+        
+        frames = self.frame_count - start_frames
+        if frames == 0:
+            print("  No frames captured")
+            return None
+        print(f"  Appended {frames} frames to the session video in {time.time() - start_time:.2f}s")
+        return self._output_path
+    
+    @contextlib.contextmanager
+    def video_session(self, name: str = "run_regression"):
+        """把会话期间所有process_command_sequence(s)调用的帧编码到同一个视频 {output_dir}/{name}.mp4
+        
+        编码器在整个会话中只打开和关闭一次，每次调用是视频中的一个章节，
+        章节的起始时间记录在self.chapters中，会话结束时保存视频并打印章节列表。
+        """
+        if self._session_path is not None:
+            raise RuntimeError("A video session is already active")
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._session_path = os.path.join(self.output_dir, f"{name}.mp4")
+        self.chapters = []
+        self.frame_count = 0
+        self.duplicate_frame_count = 0
+        self._writer = None
+        try:
+            yield self
+        finally:
+            self._session_path = None
+            if self.frame_count > 0:
+                output_path = self._save_video()
+                print(f"Session video saved to: {output_path} ({self.frame_count} frames, "
+                      f"{self.duplicate_frame_count} duplicate frames reused)")
+                for chapter, start in self.chapters:
+                    print(f"  {start:8.2f}s  {chapter}")
+    
+    def _run_commands(self, commands: Union[List[List[Union[str, float]]], PackedCommands]):
+        """执行一条指令序列并捕获帧（不打开或关闭视频）；代理无法初始化时不执行任何指令"""
+        if isinstance(commands, PackedCommands):
+            commands = unpack_commands(commands)
+        
+        if self.coalesce_commands:
+            coalesced = coalesce_commands(commands, fold_rotations=self.fold_rotations)
+            if len(coalesced) < len(commands):
+                print(f"  Coalesced {len(commands)} commands into {len(coalesced)}")
+            commands = coalesced
+        
+        if not commands and not self.agent_initialized:
+            # 没有指令可用于初始化代理位置，不捕获未初始化位姿的帧
+            print("No commands to run and agent is not initialized, nothing to capture")
+            return
+        
+        # 第一个待执行指令的下标（第一个移动指令用于初始化时跳过它，不拷贝列表）
+        start = 0
+        
+        # 如果代理还未初始化位置，使用第一个指令来设置初始位置
+        if not self.agent_initialized and len(commands) > 0:
+            first_command = commands[0]
+            
+            # 检查第一个指令是否是移动指令（包含坐标）
+            if not isinstance(first_command[0], str):
+                # 第一个指令是移动指令 [x, z]
+                target_x = float(first_command[0])
+                target_z = float(first_command[1])
+                
+                # 将代理初始化到第一个指令的位置
+                success = self._reset_agent_to_position(target_x, target_z)
+                if not success:
+                    print("ERROR: Failed to initialize agent at first command position")
+                    return
+                
+                self.agent_initialized = True
+                
+                # 添加初始帧
+                self._capture_frame()
+                
+                # 跳过第一个指令（因为代理已经在目标位置）
+                start = 1
+                print(f"Agent initialized at first command position ({target_x:.2f}, {target_z:.2f})")
+            else:
+                # 第一个指令是旋转指令，使用场景中心作为初始位置
+                center_x = (self.simulator.scene_bounds[0][0] + self.simulator.scene_bounds[1][0]) / 2
+                center_z = (self.simulator.scene_bounds[0][2] + self.simulator.scene_bounds[1][2]) / 2
+                
+                success = self._reset_agent_to_position(center_x, center_z)
+                if not success:
+                    print("ERROR: Failed to initialize agent at scene center")
+                    return
+                
+                self.agent_initialized = True
+                
+                # 添加初始帧
+                self._capture_frame()
+                print("Agent initialized at scene center (first command is rotation)")
+        else:
+            # 代理已初始化，直接添加起始帧
+            self._capture_frame()
+        
+        total = len(commands) - start
+        for i, command in enumerate(itertools.islice(commands, start, None)):
+            print(f"  Executing command {i+1}/{total}: {command}")
+            
+            success = self._execute_command(command)
+            if not success:
+                print(f"  Command {i+1} failed, stopping sequence")
+                break
+    
     def _execute_command(self, command: List[Union[str, float]]) -> bool:
         """执行单个指令"""
         try:
@@ -201,19 +432,20 @@ class HabitatVideoGenerator:
             else:  # right
                 step_angle = -abs(step_angle)
             
-            for step in range(total_steps):
-                # 执行一小步旋转
-                self._rotate_agent(step_angle)
-                
-                # 捕获帧
-                self._capture_frame()
-            
-            # 处理剩余的小数角度
+            # 一次性计算每一帧相对起始朝向的累计旋转角度（包括剩余的小数角度）
+            yaws = np.arange(1, total_steps + 1) * step_angle
             remaining_angle = angle - (total_steps * self.rotation_step)
             if abs(remaining_angle) > 0.1:  # 只有大于0.1度才执行
                 final_step = remaining_angle if direction == "left" else -remaining_angle
-                self._rotate_agent(final_step)
-                self._capture_frame()
+                yaws = np.append(yaws, yaws[-1] + final_step)
+            
+            # 批量生成所有帧的四元数，循环中只需移动代理和捕获帧
+            rotations = quat_mul_batch(quat_from_yaw_batch(np.radians(yaws)),
+                                       self._cur_rot_np).astype(np.float32)
+            position = self._cur_pos_np
+            for step, rotation in enumerate(rotations):
+                self._move_agent(position, rotation)
+                self._capture_step(step, len(rotations))
             
             return True
             
@@ -240,15 +472,14 @@ class HabitatVideoGenerator:
             if not coord_check['error_acceptable']:
                 print(f"    Warning: Target position coordinate conversion error {coord_check['position_error']:.3f}m")
             # 获取当前位置
-            current_state = self.simulator.get_agent_state()
-            current_pos = current_state.position
+            current_pos = self._cur_pos_np
 
             # 计算距离
             distance = np.linalg.norm(target_pos - current_pos)
 
             # 如果距离很近，直接瞬移
             if distance < 0.1:
-                self.simulator.move_agent_to(target_pos)
+                self._move_agent(target_pos)
                 self._capture_frame()
                 return True
 
@@ -269,7 +500,7 @@ class HabitatVideoGenerator:
             distance = np.linalg.norm(direction)
             
             if distance < 0.01:  # 距离太近，直接移动
-                self.simulator.move_agent_to(end_pos)
+                self._move_agent(end_pos)
                 self._capture_frame()
                 return True
             
@@ -281,74 +512,39 @@ class HabitatVideoGenerator:
             angle += math.pi  # 加180度修正
             
             # 创建目标旋转四元数
-            rotation = mn.Quaternion.rotation(mn.Rad(angle), mn.Vector3.y_axis())
-            target_rotation = np.array([rotation.vector.x, rotation.vector.y, 
-                                      rotation.vector.z, rotation.scalar], dtype=np.float32)
+            target_rotation = quat_from_yaw(angle).astype(np.float32)
             
             # 获取当前旋转
-            current_state = self.simulator.get_agent_state()
-            if hasattr(current_state.rotation, 'x'):
-                start_rotation = np.array([
-                    current_state.rotation.x, current_state.rotation.y, 
-                    current_state.rotation.z, current_state.rotation.w
-                ], dtype=np.float32)
-            else:
-                start_rotation = current_state.rotation.astype(np.float32)
+            start_rotation = self._cur_rot_np
             
             # 第一阶段：先执行视角转向（保持位置不变）
             rotation_steps = 15  # 转向帧数
-            for step in range(rotation_steps):
-                t = step / rotation_steps
-                
-                # 旋转插值
-                try:
-                    start_quat = mn.Quaternion(
-                        mn.Vector3(start_rotation[0], start_rotation[1], start_rotation[2]),
-                        start_rotation[3]
-                    )
-                    end_quat = mn.Quaternion(
-                        mn.Vector3(target_rotation[0], target_rotation[1], target_rotation[2]),
-                        target_rotation[3]
-                    )
-                    
-                    # 球面线性插值
-                    interpolated_quat = mn.Math.slerp(start_quat, end_quat, t)
-                    interpolated_rotation = np.array([
-                        interpolated_quat.vector.x, interpolated_quat.vector.y,
-                        interpolated_quat.vector.z, interpolated_quat.scalar
-                    ], dtype=np.float32)
-                    
-                except Exception:
-                    # 如果球面插值失败，使用线性插值
-                    interpolated_rotation = start_rotation + t * (target_rotation - start_rotation)
-                    norm = np.linalg.norm(interpolated_rotation)
-                    if norm > 0:
-                        interpolated_rotation = interpolated_rotation / norm
-                
+            for step, interpolated_rotation in enumerate(
+                    self._interpolate_rotations(start_rotation, target_rotation, rotation_steps)):
                 # 只改变旋转，保持当前位置
-                self.simulator.move_agent_to(start_pos, interpolated_rotation)
-                self._capture_frame()
+                self._move_agent(start_pos, interpolated_rotation)
+                self._capture_step(step, rotation_steps)
             
             # 确保转向完成
-            self.simulator.move_agent_to(start_pos, target_rotation)
+            self._move_agent(start_pos, target_rotation)
             self._capture_frame()
             
             # 第二阶段：再执行位置移动（保持目标朝向）
             total_steps = max(1, int(distance / self.movement_step))
             direction_vector = (end_pos - start_pos) / total_steps
+            positions = start_pos + direction_vector * np.arange(1, total_steps + 1)[:, None]
             
-            for step in range(total_steps):
-                # 计算下一个位置
-                next_pos = start_pos + direction_vector * (step + 1)
-                
-                # 碰撞检测
-                if not self.simulator.is_navigable(next_pos[0], next_pos[2]):
-                    print(f"    ERROR: Collision detected at step {step+1}/{total_steps}")
-                    return False
-                
+            # 碰撞检测：一次性检查整条直线，找到第一个被阻挡的步
+            clear_steps = self.simulator.count_clear_steps(start_pos, positions)
+            
+            for step, next_pos in enumerate(positions[:clear_steps]):
                 # 移动代理（保持目标朝向）
-                self.simulator.move_agent_to(next_pos, target_rotation)
-                self._capture_frame()
+                self._move_agent(next_pos, target_rotation)
+                self._capture_step(step, clear_steps)
+            
+            if clear_steps < total_steps:
+                print(f"    ERROR: Collision detected at step {clear_steps+1}/{total_steps}")
+                return False
             
             return True
             
@@ -374,58 +570,23 @@ class HabitatVideoGenerator:
                     angle += math.pi  # 加180度修正（复刻interactive_app）
                     
                     # 创建朝向目标的旋转四元数
-                    rotation = mn.Quaternion.rotation(mn.Rad(angle), mn.Vector3.y_axis())
-                    target_rotation = np.array([rotation.vector.x, rotation.vector.y, 
-                                              rotation.vector.z, rotation.scalar], dtype=np.float32)
+                    target_rotation = quat_from_yaw(angle).astype(np.float32)
                 else:
                     target_rotation = np.array([0, 0, 0, 1], dtype=np.float32)
                 
                 # 获取当前旋转
-                current_state = self.simulator.get_agent_state()
-                if hasattr(current_state.rotation, 'x'):
-                    start_rotation = np.array([
-                        current_state.rotation.x, current_state.rotation.y, 
-                        current_state.rotation.z, current_state.rotation.w
-                    ], dtype=np.float32)
-                else:
-                    start_rotation = current_state.rotation.astype(np.float32)
+                start_rotation = self._cur_rot_np
                 
                 # 第一阶段：先执行视角转向（保持位置不变）
                 rotation_steps = self.interpolation_steps // 2  # 转向用一半的帧数
-                for step in range(rotation_steps):
-                    t = step / rotation_steps
-                    
-                    # 旋转插值（球面线性插值）
-                    try:
-                        start_quat = mn.Quaternion(
-                            mn.Vector3(start_rotation[0], start_rotation[1], start_rotation[2]),
-                            start_rotation[3]
-                        )
-                        end_quat = mn.Quaternion(
-                            mn.Vector3(target_rotation[0], target_rotation[1], target_rotation[2]),
-                            target_rotation[3]
-                        )
-                        
-                        # 球面线性插值
-                        interpolated_quat = mn.Math.slerp(start_quat, end_quat, t)
-                        interpolated_rotation = np.array([
-                            interpolated_quat.vector.x, interpolated_quat.vector.y,
-                            interpolated_quat.vector.z, interpolated_quat.scalar
-                        ], dtype=np.float32)
-                        
-                    except Exception:
-                        # 如果球面插值失败，使用线性插值
-                        interpolated_rotation = start_rotation + t * (target_rotation - start_rotation)
-                        norm = np.linalg.norm(interpolated_rotation)
-                        if norm > 0:
-                            interpolated_rotation = interpolated_rotation / norm
-                    
+                for step, interpolated_rotation in enumerate(
+                        self._interpolate_rotations(start_rotation, target_rotation, rotation_steps)):
                     # 只改变旋转，保持当前位置
-                    self.simulator.move_agent_to(start_pos, interpolated_rotation)
-                    self._capture_frame()
+                    self._move_agent(start_pos, interpolated_rotation)
+                    self._capture_step(step, rotation_steps)
                 
                 # 确保转向完成
-                self.simulator.move_agent_to(start_pos, target_rotation)
+                self._move_agent(start_pos, target_rotation)
                 self._capture_frame()
                 
                 # 第二阶段：再执行位置移动（保持目标朝向）
@@ -437,11 +598,11 @@ class HabitatVideoGenerator:
                     interpolated_pos = start_pos + t * (end_pos - start_pos)
                     
                     # 保持目标旋转不变
-                    self.simulator.move_agent_to(interpolated_pos, target_rotation)
-                    self._capture_frame()
+                    self._move_agent(interpolated_pos, target_rotation)
+                    self._capture_step(step, movement_steps)
                 
                 # 确保到达精确的路径点
-                self.simulator.move_agent_to(end_pos, target_rotation)
+                self._move_agent(end_pos, target_rotation)
                 self._capture_frame()
             
             return True
@@ -450,82 +611,106 @@ class HabitatVideoGenerator:
             print(f"    Path movement failed: {e}")
             return False
     
-    def _rotate_agent(self, angle_degrees: float):
-        """旋转代理（基于interactive_app的实现）"""
-        agent_state = self.simulator.agent.get_state()
-        
-        # 将角度转换为弧度
-        angle_rad = math.radians(angle_degrees)
-        
-        # 创建绕Y轴的旋转四元数
-        rotation_quat = mn.Quaternion.rotation(mn.Rad(angle_rad), mn.Vector3.y_axis())
-        
-        # 获取当前旋转
-        current_rotation = agent_state.rotation
-        if hasattr(current_rotation, 'x'):
-            current_quat = mn.Quaternion(
-                mn.Vector3(current_rotation.x, current_rotation.y, current_rotation.z),
-                current_rotation.w
-            )
+    def _interpolate_rotations(self, start_rotation: np.ndarray, target_rotation: np.ndarray,
+                               steps: int) -> np.ndarray:
+        """预先计算整段转向的球面插值四元数，返回 (steps, 4) 数组"""
+        return slerp_batch(start_rotation, target_rotation, steps).astype(np.float32)
+    
+    def _move_agent(self, position: np.ndarray, rotation: Optional[np.ndarray] = None):
+        """移动代理并同步更新位置/旋转缓存（rotation为None时与move_agent_to一致，重置为默认朝向）"""
+        self.simulator.move_agent_to(position, rotation)
+        self._cur_pos_np = np.array(position, dtype=np.float32)
+        if rotation is None:
+            self._cur_rot_np = np.array([0, 0, 0, 1], dtype=np.float32)
         else:
-            current_quat = mn.Quaternion(
-                mn.Vector3(current_rotation[0], current_rotation[1], current_rotation[2]),
-                current_rotation[3]
-            )
-        
-        # 应用旋转
-        new_rotation = rotation_quat * current_quat
-        
-        # 更新代理状态
-        agent_state.rotation = np.array([
-            new_rotation.vector.x, new_rotation.vector.y,
-            new_rotation.vector.z, new_rotation.scalar
-        ], dtype=np.float32)
+            self._cur_rot_np = np.array(rotation, dtype=np.float32)
+    
+    def _rotate_agent(self, angle_degrees: float):
+        """旋转代理（基于interactive_app的实现，直接在缓存的numpy四元数上计算）"""
+        # 创建绕Y轴的旋转四元数并应用到当前旋转
+        rotation_quat = quat_from_yaw(math.radians(angle_degrees))
+        new_rotation = quat_mul(rotation_quat, self._cur_rot_np)
         
-        self.simulator.agent.set_state(agent_state)
+        # 更新代理状态（位置不变）
+        self._move_agent(self._cur_pos_np, new_rotation)
+    
+    def _capture_step(self, step: int, total_steps: int):
+        """动画循环中的第step步（从0开始）：每capture_every步捕获一帧，最后一步总是捕获"""
+        if (step + 1) % self.capture_every == 0 or step == total_steps - 1:
+            self._capture_frame()
     
     def _capture_frame(self):
         """捕获当前帧（左右分屏，修复坐标转换问题，提高分辨率）"""
+        # 检查代理是否已初始化
+        if not self.agent_initialized:
+            print("    Warning: Attempting to capture frame before agent initialization")
+            return
+        
         try:
-            # 检查代理是否已初始化
-            if not self.agent_initialized:
-                print("    Warning: Attempting to capture frame before agent initialization")
-                return
-            
-            # 获取FPV图像
-            fpv_image = self.simulator.get_fpv_observation()
-            fpv_pil = Image.fromarray(fpv_image[..., :3], "RGB")
-            
-            # 获取俯视图（复用基础地图）
-            map_image = self.simulator.base_map_image.copy()
-            
-            # 在原始地图上绘制代理（使用正确的坐标系）
-            agent_state = self.simulator.get_agent_state()
-            self._draw_agent_on_original_map(map_image, agent_state.position, agent_state.rotation)
-            
-            # 然后调整地图大小，保持纵横比，提高分辨率到1024x1024
-            map_resized = self._resize_map_with_aspect_ratio(map_image, 1024, 1024)
-            
-            # 调整FPV图像大小到1024x1024
-            fpv_resized = fpv_pil.resize((1024, 1024), Image.Resampling.LANCZOS)
-            
-            # 创建左右分屏图像 (2048x1024)
-            combined = Image.new('RGB', (2048, 1024))
-            combined.paste(fpv_resized, (0, 0))
-            combined.paste(map_resized, (1024, 0))
-            
-            # 转换为numpy数组并添加到帧列表
-            frame_array = np.array(combined)
-            self.current_frames.append(frame_array)
-            
+            self._render_frame()
         except Exception as e:
             print(f"    Failed to capture frame: {e}")
-            import traceback
             traceback.print_exc()
     
-    def _resize_map_with_aspect_ratio(self, image: Image.Image, target_width: int, target_height: int) -> Image.Image:
-        """调整地图大小同时保持纵横比，多余空间用黑色填充"""
-        original_width, original_height = image.size
+    def _render_frame(self):
+        """渲染当前位姿的分屏画面并送入编码器（异常由_capture_frame统一报告）"""
+        # 位姿与上一帧几乎相同时，帧缓冲区中的画面仍然有效，跳过FPV渲染和地图绘制
+        if self._is_same_pose_as_last_frame():
+            self._write_frame(self._frame_buf)
+            self.duplicate_frame_count += 1
+            return
+        
+        # 渲染期间帧缓冲区会被覆盖，失败时不能再复用
+        self._last_pose = None
+        
+        # 获取FPV图像（RGB视图，不含alpha）写入左半部分
+        fpv_rgb = self.simulator.get_fpv_rgb()
+        fpv_h, fpv_w = fpv_rgb.shape[:2]
+        fpv_panel = self._frame_buf[:, :self.panel_width]
+        if (fpv_w, fpv_h) == (self.panel_width, self.video_height):
+            # 渲染分辨率与面板一致（默认1024x1024，随render_scale缩放），直接拷贝，无需缩放
+            np.copyto(fpv_panel, fpv_rgb)
+        else:
+            # OpenCV需要连续输入，只拷贝RGB三个通道
+            cv2.resize(np.ascontiguousarray(fpv_rgb), (self.panel_width, self.video_height), dst=fpv_panel,
+                       interpolation=_resize_interpolation(fpv_w, fpv_h, self.panel_width, self.video_height))
+        
+        # 获取俯视图（复用工作地图，先擦除上一帧的代理标记）
+        map_image = self._map_work
+        if self._map_dirty_box is not None:
+            x0, y0, x1, y1 = self._map_dirty_box
+            map_image[y0:y1, x0:x1] = self._base_map_np[y0:y1, x0:x1]
+        
+        # 在原始地图上绘制代理（使用正确的坐标系）
+        # 绘制中途出错时整张地图都可能被弄脏，先标记为整图
+        self._map_dirty_box = (0, 0, map_image.shape[1], map_image.shape[0])
+        self._map_dirty_box = self._draw_agent_on_original_map(map_image, self._cur_pos_np,
+                                                               self._cur_rot_np)
+        
+        # 调整地图大小并保持纵横比，直接写入右半部分的地图区域
+        cv2.resize(map_image, self._map_size, dst=self._map_dst,
+                   interpolation=self._map_interpolation)
+        
+        # 直接送入编码器，帧缓冲区随后被下一帧覆盖
+        self._write_frame(self._frame_buf)
+        self._last_pose = (self._cur_pos_np, self._cur_rot_np)
+    
+    def _is_same_pose_as_last_frame(self) -> bool:
+        """当前位姿是否与帧缓冲区中最后渲染的位姿几乎相同"""
+        if self._last_pose is None:
+            return False
+        last_pos, last_rot = self._last_pose
+        if np.linalg.norm(self._cur_pos_np - last_pos) >= self.DUPLICATE_POSITION_EPS:
+            return False
+        # q和-q表示同一旋转
+        rotation_diff = min(np.abs(self._cur_rot_np - last_rot).max(),
+                            np.abs(self._cur_rot_np + last_rot).max())
+        return rotation_diff < self.DUPLICATE_ROTATION_EPS
+    
+    @staticmethod
+    def _letterbox_geometry(original_width: int, original_height: int,
+                            target_width: int, target_height: int) -> Tuple[int, int, int, int]:
+        """计算保持纵横比缩放后的尺寸和居中偏移，返回 (new_width, new_height, x_offset, y_offset)"""
         original_aspect = original_width / original_height
         target_aspect = target_width / target_height
         
@@ -538,266 +723,156 @@ class HabitatVideoGenerator:
             new_height = target_height
             new_width = int(target_height * original_aspect)
         
-        # 缩放图像
-        resized_image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
-        # 创建黑色背景
-        result = Image.new('RGB', (target_width, target_height), (0, 0, 0))
-        
-        # 居中粘贴缩放后的图像
+        # 居中放置，四周留黑色边框
         x_offset = (target_width - new_width) // 2
         y_offset = (target_height - new_height) // 2
-        result.paste(resized_image, (x_offset, y_offset))
-        
-        return result
+        return new_width, new_height, x_offset, y_offset
     
-    def _draw_agent_on_original_map(self, image: Image.Image, agent_pos: np.ndarray, 
-                                   agent_rotation: Optional[np.ndarray] = None):
-        """在原始地图上绘制代理位置和朝向（使用修复后的坐标系）"""
-        draw = ImageDraw.Draw(image)
-        
-        # 使用修复后的HabitatSimulator的world_to_map_coords方法
-        # 该方法已经修复了padding偏移问题，会正确处理坐标转换
-        map_x, map_y = self.simulator.world_to_map_coords(agent_pos)
-        
-        # 验证坐标转换精度（用于调试）
-        coord_check = self.simulator.verify_coordinate_conversion(agent_pos)
-        if not coord_check['error_acceptable']:
-            print(f"    Warning: Coordinate conversion error {coord_check['position_error']:.3f}m for agent position")
-        
-        # 确保坐标在原始地图范围内
-        original_width, original_height = image.size
-        map_x = max(0, min(map_x, original_width - 1))
-        map_y = max(0, min(map_y, original_height - 1))
-        
-        # 绘制代理位置（红点）
-        dot_radius = 8  # 固定大小，因为是在原始地图上绘制
-        draw.ellipse([
-            map_x - dot_radius, map_y - dot_radius,
-            map_x + dot_radius, map_y + dot_radius
-        ], fill=(255, 0, 0))
-        
-        # 绘制朝向箭头
-        if agent_rotation is not None:
-            try:
-                if hasattr(agent_rotation, 'x'):
-                    rotation_array = np.array([agent_rotation.x, agent_rotation.y, agent_rotation.z, agent_rotation.w], dtype=np.float32)
-                elif isinstance(agent_rotation, np.ndarray):
-                    rotation_array = agent_rotation.astype(np.float32)
-                else:
-                    rotation_array = np.array(agent_rotation, dtype=np.float32)
-                
-                if len(rotation_array) == 4:
-                    quat = mn.Quaternion(
-                        mn.Vector3(float(rotation_array[0]), float(rotation_array[1]), float(rotation_array[2])),
-                        float(rotation_array[3])
-                    )
-                    
-                    # 在Habitat中，-Z轴是前方
-                    forward_vec = quat.transform_vector(mn.Vector3(0, 0, -1))
-                    
-                    # 计算箭头终点（固定长度）
-                    arrow_length = 20
-                    arrow_end_x = map_x + int(forward_vec.x * arrow_length)
-                    arrow_end_y = map_y + int(forward_vec.z * arrow_length)
-                    
-                    # 确保箭头终点在图像范围内
-                    arrow_end_x = max(0, min(arrow_end_x, original_width - 1))
-                    arrow_end_y = max(0, min(arrow_end_y, original_height - 1))
-                    
-                    # 绘制箭头线
-                    draw.line([(map_x, map_y), (arrow_end_x, arrow_end_y)], 
-                             fill=(255, 0, 0), width=3)
-                    
-                    # 绘制箭头头部
-                    angle = math.atan2(forward_vec.z, forward_vec.x)
-                    arrow_head_length = 10
-                    
-                    head_angle1 = angle + math.pi * 0.8
-                    head_angle2 = angle - math.pi * 0.8
-                    
-                    head_x1 = arrow_end_x + int(math.cos(head_angle1) * arrow_head_length)
-                    head_y1 = arrow_end_y + int(math.sin(head_angle1) * arrow_head_length)
-                    head_x2 = arrow_end_x + int(math.cos(head_angle2) * arrow_head_length)
-                    head_y2 = arrow_end_y + int(math.sin(head_angle2) * arrow_head_length)
-                    
-                    # 确保箭头头部在图像范围内
-                    head_x1 = max(0, min(head_x1, original_width - 1))
-                    head_y1 = max(0, min(head_y1, original_height - 1))
-                    head_x2 = max(0, min(head_x2, original_width - 1))
-                    head_y2 = max(0, min(head_y2, original_height - 1))
-                    
-                    draw.line([(arrow_end_x, arrow_end_y), (head_x1, head_y1)], 
-                             fill=(255, 0, 0), width=2)
-                    draw.line([(arrow_end_x, arrow_end_y), (head_x2, head_y2)], 
-                             fill=(255, 0, 0), width=2)
-            except Exception as e:
-                # 如果箭头绘制失败，只显示点
-                print(f"    Warning: Failed to draw arrow: {e}")
-                pass
-
-    def _draw_agent_on_map(self, image: Image.Image, agent_pos: np.ndarray, 
-                          agent_rotation: Optional[np.ndarray] = None):
-        """在地图上绘制代理位置和朝向（使用修复后的坐标转换）"""
-        draw = ImageDraw.Draw(image)
+    def _build_agent_sprites(self):
+        """预先绘制代理标记的掩码：AGENT_SPRITE_BINS个朝向的红点+箭头，以及无朝向时的红点
         
-        # 使用修复后的坐标转换方法获取原始地图坐标
-        original_map_coords = self.simulator.world_to_map_coords(agent_pos)
+        几何与原先逐帧绘制一致（箭头长度、头部偏转角、线宽），只是朝向量化到
+        360/AGENT_SPRITE_BINS度；每帧只需按朝向取出掩码并贴到地图上。
+        """
+        radius = self.ARROW_LENGTH + self.ARROW_WIDTH
+        size = 2 * radius + 1
+        center = (radius, radius)
         
-        # 验证坐标转换精度
-        coord_check = self.simulator.verify_coordinate_conversion(agent_pos)
-        if not coord_check['error_acceptable']:
-            print(f"    Warning: Coordinate conversion error {coord_check['position_error']:.3f}m")
+        dot = np.zeros((size, size), dtype=np.uint8)
+        cv2.circle(dot, center, self.AGENT_DOT_RADIUS, 1, -1)
         
-        # 获取原始地图和当前图像的尺寸
-        original_map_width, original_map_height = self.simulator.base_map_image.size
-        current_width, current_height = image.size
+        sprites = np.zeros((self.AGENT_SPRITE_BINS, size, size), dtype=np.uint8)
+        for i, angle in enumerate(np.arange(self.AGENT_SPRITE_BINS) * (2 * math.pi / self.AGENT_SPRITE_BINS)):
+            sprite = sprites[i]
+            sprite[:] = dot
+            arrow_end = (radius + int(math.cos(angle) * self.ARROW_LENGTH),
+                         radius + int(math.sin(angle) * self.ARROW_LENGTH))
+            cv2.line(sprite, center, arrow_end, 1, self.ARROW_WIDTH)
+            for head_angle in (angle + self.ARROW_HEAD_ANGLE, angle - self.ARROW_HEAD_ANGLE):
+                head = (arrow_end[0] + int(math.cos(head_angle) * self.ARROW_HEAD_LENGTH),
+                        arrow_end[1] + int(math.sin(head_angle) * self.ARROW_HEAD_LENGTH))
+                cv2.line(sprite, arrow_end, head, 1, self.ARROW_HEAD_WIDTH)
         
-        # 计算缩放和偏移
-        # 假设当前图像是通过_resize_map_with_aspect_ratio处理的
-        original_aspect = original_map_width / original_map_height
-        current_aspect = current_width / current_height
+        self._sprite_radius = radius
+        self._agent_sprites = sprites.astype(bool)
+        self._agent_dot_sprite = dot.astype(bool)
+        self._agent_color = np.array(self.AGENT_COLOR, dtype=np.uint8)
+    
+    @staticmethod
+    def _agent_forward_xz(agent_rotation) -> Optional[Tuple[float, float]]:
+        """代理朝向在XZ平面上的前向向量；没有旋转、旋转无效或结果非有限值时返回None
         
-        if original_aspect > current_aspect:
-            # 原图更宽，按宽度缩放
-            scale = current_width / original_map_width
-            scaled_width = current_width
-            scaled_height = int(original_map_height * scale)
-            x_offset = 0
-            y_offset = (current_height - scaled_height) // 2
+        只有四元数的获取和转换需要异常处理，之后的绘制不再包在try中。
+        """
+        if agent_rotation is None:
+            return None
+        try:
+            rotation_array = _rotation_to_np(agent_rotation)
+        except Exception as e:
+            print(f"    Warning: Invalid agent rotation: {e}")
+            return None
+        if len(rotation_array) != 4:
+            return None
+        # 在Habitat中，-Z轴是前方
+        forward_x, forward_z = quat_forward_xz(rotation_array)
+        if not (math.isfinite(forward_x) and math.isfinite(forward_z)):
+            return None
+        return forward_x, forward_z
+    
+    def _draw_agent_on_original_map(self, image: np.ndarray, agent_pos: np.ndarray, 
+                                   agent_rotation: Optional[np.ndarray] = None) -> Optional[Tuple[int, int, int, int]]:
+        """在原始地图上绘制代理位置和朝向（使用修复后的坐标系，贴预先绘制的标记掩码）
+        
+        返回被绘制覆盖的区域 (x0, y0, x1, y1)，未绘制时返回None。
+        """
+        # 一次转换同时得到地图坐标和转换精度（用于调试）
+        coord_check = self.simulator.verify_coord_batch(np.asarray(agent_pos)[None, :])
+        if not coord_check['error_acceptable'][0]:
+            print(f"    Warning: Coordinate conversion error {coord_check['position_error'][0]:.3f}m for agent position")
+        map_x, map_y = coord_check['map_coords'][0].tolist()
+        
+        forward = self._agent_forward_xz(agent_rotation)
+        if forward is None:
+            sprite = self._agent_dot_sprite
         else:
-            # 原图更高，按高度缩放
-            scale = current_height / original_map_height
-            scaled_width = int(original_map_width * scale)
-            scaled_height = current_height
-            x_offset = (current_width - scaled_width) // 2
-            y_offset = 0
-        
-        # 转换坐标到当前图像坐标系
-        map_x = int(original_map_coords[0] * scale + x_offset)
-        map_y = int(original_map_coords[1] * scale + y_offset)
-        
-        # 确保坐标在图像范围内
-        map_x = max(0, min(map_x, current_width - 1))
-        map_y = max(0, min(map_y, current_height - 1))
-        
-        # 绘制代理位置（红点）
-        dot_radius = max(4, int(8 * scale))  # 根据缩放调整点的大小
-        draw.ellipse([
-            map_x - dot_radius, map_y - dot_radius,
-            map_x + dot_radius, map_y + dot_radius
-        ], fill=(255, 0, 0))
-        
-        # 绘制朝向箭头
-        if agent_rotation is not None:
-            try:
-                if hasattr(agent_rotation, 'x'):
-                    rotation_array = np.array([agent_rotation.x, agent_rotation.y, agent_rotation.z, agent_rotation.w], dtype=np.float32)
-                elif isinstance(agent_rotation, np.ndarray):
-                    rotation_array = agent_rotation.astype(np.float32)
-                else:
-                    rotation_array = np.array(agent_rotation, dtype=np.float32)
-                
-                if len(rotation_array) == 4:
-                    quat = mn.Quaternion(
-                        mn.Vector3(float(rotation_array[0]), float(rotation_array[1]), float(rotation_array[2])),
-                        float(rotation_array[3])
-                    )
-                    
-                    # 在Habitat中，-Z轴是前方
-                    forward_vec = quat.transform_vector(mn.Vector3(0, 0, -1))
-                    
-                    # 计算箭头终点（根据缩放调整长度）
-                    arrow_length = max(10, int(20 * scale))
-                    arrow_end_x = map_x + int(forward_vec.x * arrow_length)
-                    arrow_end_y = map_y + int(forward_vec.z * arrow_length)
-                    
-                    # 确保箭头终点在图像范围内
-                    arrow_end_x = max(0, min(arrow_end_x, current_width - 1))
-                    arrow_end_y = max(0, min(arrow_end_y, current_height - 1))
-                    
-                    # 绘制箭头线
-                    line_width = max(2, int(3 * scale))
-                    draw.line([(map_x, map_y), (arrow_end_x, arrow_end_y)], 
-                             fill=(255, 0, 0), width=line_width)
-                    
-                    # 绘制箭头头部
-                    angle = math.atan2(forward_vec.z, forward_vec.x)
-                    arrow_head_length = max(5, int(10 * scale))
-                    
-                    head_angle1 = angle + math.pi * 0.8
-                    head_angle2 = angle - math.pi * 0.8
-                    
-                    head_x1 = arrow_end_x + int(math.cos(head_angle1) * arrow_head_length)
-                    head_y1 = arrow_end_y + int(math.sin(head_angle1) * arrow_head_length)
-                    head_x2 = arrow_end_x + int(math.cos(head_angle2) * arrow_head_length)
-                    head_y2 = arrow_end_y + int(math.sin(head_angle2) * arrow_head_length)
-                    
-                    # 确保箭头头部在图像范围内
-                    head_x1 = max(0, min(head_x1, current_width - 1))
-                    head_y1 = max(0, min(head_y1, current_height - 1))
-                    head_x2 = max(0, min(head_x2, current_width - 1))
-                    head_y2 = max(0, min(head_y2, current_height - 1))
-                    
-                    head_width = max(1, int(2 * scale))
-                    draw.line([(arrow_end_x, arrow_end_y), (head_x1, head_y1)], 
-                             fill=(255, 0, 0), width=head_width)
-                    draw.line([(arrow_end_x, arrow_end_y), (head_x2, head_y2)], 
-                             fill=(255, 0, 0), width=head_width)
-            except Exception as e:
-                # 如果箭头绘制失败，只显示点
-                print(f"    Warning: Failed to draw arrow: {e}")
-                pass
+            # 按朝向角选择对应的标记
+            angle = math.atan2(forward[1], forward[0])
+            sprite_bin = int(round(angle / (2 * math.pi) * self.AGENT_SPRITE_BINS)) % self.AGENT_SPRITE_BINS
+            sprite = self._agent_sprites[sprite_bin]
+        
+        # 贴图区域（在图像边缘处裁剪）
+        radius = self._sprite_radius
+        height, width = image.shape[:2]
+        x0, y0 = max(0, map_x - radius), max(0, map_y - radius)
+        x1, y1 = min(width, map_x + radius + 1), min(height, map_y + radius + 1)
+        mask = sprite[y0 - (map_y - radius):y1 - (map_y - radius),
+                      x0 - (map_x - radius):x1 - (map_x - radius)]
+        image[y0:y1, x0:x1][mask] = self._agent_color
+        return (x0, y0, x1, y1)
+    
+    def _write_frame(self, frame: np.ndarray):
+        """将一帧写入当前序列的视频（第一帧时打开写入器）"""
+        if self._writer is None:
+            if self._session_path is not None:
+                # video_session中所有调用写入同一个视频
+                self._output_path = self._session_path
+            else:
+                # 生成时间戳+序列编号文件名
+                stem = f"output_{time.strftime('%Y%m%d_%H%M%S')}_{next(self._seq_counter)}"
+                self._output_path = os.path.join(self.output_dir, f"{stem}.mp4")
+            # 编码期间写入临时文件，完成后再重命名，输出目录中不会出现不完整的视频
+            partial_path = os.path.splitext(self._output_path)[0] + ".partial.mp4"
+            # 编码在后台线程中进行，与下一帧的FPV渲染和地图绘制重叠
+            self._writer = ThreadedVideoWriter(
+                open_video_writer(partial_path, self.fps, self.video_width, self.video_height,
+                                  gpu_device_id=self.gpu_device_id),
+                self._frame_buf.shape)
+        
+        self._writer.write(frame)
+        self.frame_count += 1
     
     def _save_video(self) -> str:
-        """保存视频文件"""
-        if len(self.current_frames) == 0:
+        """结束编码并返回视频文件路径"""
+        if self._writer is None or self.frame_count == 0:
             raise ValueError("No frames to save")
         
-        # 生成时间戳文件名
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"output_{timestamp}.mp4"
-        output_path = os.path.join(self.output_dir, filename)
-        
-        # 使用cv2.VideoWriter保存视频
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        writer = cv2.VideoWriter(output_path, fourcc, self.fps, (self.video_width, self.video_height))
+        writer = self._writer
+        self._writer = None
+        partial_path = writer.output_path
         
         try:
-            for frame in self.current_frames:
-                # 转换RGB到BGR（OpenCV格式）
-                frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                writer.write(frame_bgr)
-            
-            writer.release()
-            return output_path
+            writer.close()
+            os.replace(partial_path, self._output_path)
+            return self._output_path
             
         except Exception as e:
-            writer.release()
             # 如果保存失败，尝试删除不完整的文件
-            if os.path.exists(output_path):
-                os.remove(output_path)
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
             raise RuntimeError(f"Failed to save video: {e}")
     
     def get_agent_position(self) -> Tuple[float, float, float]:
         """获取代理当前位置"""
         if self.simulator and self.agent_initialized:
-            state = self.simulator.get_agent_state()
-            pos = state.position
-            return (float(pos[0]), float(pos[1]), float(pos[2]))
+            pos = np.asarray(self.simulator.get_agent_state().position, dtype=np.float64)
+            return tuple(pos.tolist())
         return (0.0, 0.0, 0.0)
     
     def get_agent_rotation(self) -> Tuple[float, float, float, float]:
         """获取代理当前旋转（四元数）"""
         if self.simulator and self.agent_initialized:
-            state = self.simulator.get_agent_state()
-            rot = state.rotation
-            if hasattr(rot, 'x'):
-                return (float(rot.x), float(rot.y), float(rot.z), float(rot.w))
-            else:
-                return (float(rot[0]), float(rot[1]), float(rot[2]), float(rot[3]))
+            rot = _rotation_to_np(self.simulator.get_agent_state().rotation)
+            return tuple(rot.tolist())
         return (0.0, 0.0, 0.0, 1.0)
     
+    def reset_agent(self):
+        """重置代理状态，下一条指令序列会像新建的生成器一样重新初始化代理位置
+        
+        用于在多个测试之间复用同一个生成器（场景和GPU上下文只加载一次）。
+        """
+        self.agent_initialized = False
+        self._last_pose = None
+    
     def close(self):
         """关闭模拟器"""
         if self.simulator:
@@ -814,22 +889,18 @@ class HabitatVideoGenerator:
                 self.simulator.scene_bounds[1],  # 最大角
             ]
             
-            total_error = 0.0
-            max_error = 0.0
-            acceptable_count = 0
+            # 一次调用完成所有测试点的正向/反向转换
+            result = self.simulator.verify_coord_batch(np.asarray(test_points))
+            errors = result['position_error']
+            acceptable = result['error_acceptable']
             
             print("=== 坐标转换精度验证 ===")
-            for i, test_point in enumerate(test_points):
-                result = self.simulator.verify_coordinate_conversion(test_point)
-                total_error += result['position_error']
-                max_error = max(max_error, result['position_error'])
-                if result['error_acceptable']:
-                    acceptable_count += 1
-                
-                print(f"  测试点{i+1}: 误差 {result['position_error']:.6f}m {'✓' if result['error_acceptable'] else '⚠'}")
+            for i, (error, ok) in enumerate(zip(errors, acceptable)):
+                print(f"  测试点{i+1}: 误差 {error:.6f}m {'✓' if ok else '⚠'}")
             
-            avg_error = total_error / len(test_points)
-            success_rate = acceptable_count / len(test_points) * 100
+            avg_error = float(np.mean(errors))
+            max_error = float(np.max(errors))
+            success_rate = float(np.mean(acceptable)) * 100
             
             print(f"  平均误差: {avg_error:.6f}m")
             print(f"  最大误差: {max_error:.6f}m") 
@@ -848,46 +919,27 @@ class HabitatVideoGenerator:
         if not self.simulator or not self.agent_initialized:
             return {
                 'error': 'Agent not initialized yet',
-                'scene_info': {
-                    'bounds': {
-                        'min': [float(self.simulator.scene_bounds[0][i]) for i in range(3)] if self.simulator else [],
-                        'max': [float(self.simulator.scene_bounds[1][i]) for i in range(3)] if self.simulator else []
-                    },
-                    'center': [float(self.simulator.scene_center[i]) for i in range(3)] if self.simulator else []
+                'scene_info': self.simulator.get_scene_info() if self.simulator else {
+                    'bounds': {'min': [], 'max': []},
+                    'center': []
                 }
             }
         
         try:
-            agent_state = self.simulator.get_agent_state()
-            world_pos = agent_state.position
-            
-            # 获取地图坐标
-            map_coords = self.simulator.world_to_map_coords(world_pos)
+            world_pos = np.asarray(self.simulator.get_agent_state().position, dtype=np.float64)
             
-            # 验证坐标转换精度
-            coord_check = self.simulator.verify_coordinate_conversion(world_pos)
+            # 获取地图坐标并验证坐标转换精度（一次正向转换同时得到两者）
+            coord_check = self.simulator.verify_coord_batch(world_pos[None, :])
+            map_coords = coord_check['map_coords'][0]
             
             return {
-                'world_position': {
-                    'x': float(world_pos[0]),
-                    'y': float(world_pos[1]), 
-                    'z': float(world_pos[2])
-                },
-                'map_coordinates': {
-                    'x': int(map_coords[0]),
-                    'y': int(map_coords[1])
-                },
+                'world_position': dict(zip('xyz', world_pos.tolist())),
+                'map_coordinates': dict(zip('xy', map_coords.tolist())),
                 'coordinate_accuracy': {
-                    'error': coord_check['position_error'],
-                    'acceptable': coord_check['error_acceptable']
-                },
-                'scene_info': {
-                    'bounds': {
-                        'min': [float(self.simulator.scene_bounds[0][i]) for i in range(3)],
-                        'max': [float(self.simulator.scene_bounds[1][i]) for i in range(3)]
-                    },
-                    'center': [float(self.simulator.scene_center[i]) for i in range(3)]
+                    'error': float(coord_check['position_error'][0]),
+                    'acceptable': bool(coord_check['error_acceptable'][0])
                 },
+                'scene_info': self.simulator.get_scene_info(),
                 'agent_initialized': self.agent_initialized
             }
             
@@ -898,12 +950,147 @@ class HabitatVideoGenerator:
 class CustomHabitatSimulator(HabitatSimulator):
     """自定义Habitat模拟器，支持指定GPU设备，继承修复后的坐标转换功能"""
     
+    GROUND_HEIGHT = 1.5  # 父类snap_to_navigable/map_coords_to_world使用的固定Y坐标
+    COORD_ERROR_TOLERANCE = 0.1  # 与父类verify_coordinate_conversion一致，10cm以内可接受
+    
     def __init__(self, scene_filepath: str, resolution: Tuple[int, int] = (512, 512), 
                  gpu_device_id: int = 0):
         self.gpu_device_id = gpu_device_id
+        self._map_params = None  # 地图坐标转换参数缓存
+        self._ortho_resolution = None  # 正交传感器的正式分辨率 (height, width)
+        self._sim_config = None  # (backend_cfg, fpv_sensor_spec)，基础地图生成后用于去掉正交传感器
         # 继承父类的所有修复，包括坐标转换和padding常量
         super().__init__(scene_filepath, resolution)
     
+    def map_transform_params(self) -> tuple:
+        """world_to_map_coords使用的转换参数（按world_to_map_batch的参数顺序）
+        
+        基础地图只生成一次，参数在首次调用时计算并缓存。
+        """
+        if self._map_params is None:
+            padded_width, padded_height = self.base_map_image.size
+            bounds_min, bounds_max = self.scene_bounds
+            self._map_params = (
+                float(bounds_min[0]), float(bounds_min[2]),
+                float(bounds_max[0] - bounds_min[0]), float(bounds_max[2] - bounds_min[2]),
+                padded_width - self.MAP_PADDING_LEFT - self.MAP_PADDING_RIGHT,
+                padded_height - self.MAP_PADDING_TOP - self.MAP_PADDING_BOTTOM,
+                self.MAP_PADDING_LEFT, self.MAP_PADDING_TOP,
+                padded_width, padded_height,
+            )
+        return self._map_params
+    
+    def world_to_map_coords(self, world_pos: np.ndarray) -> Tuple[int, int]:
+        """将3D世界坐标转换为2D地图像素坐标（JIT内核，结果与父类一致）"""
+        if self.base_map_image is None:
+            return (0, 0)
+        return world_to_map(float(world_pos[0]), float(world_pos[2]), *self.map_transform_params())
+    
+    def verify_coord_batch(self, world_pts: np.ndarray) -> dict:
+        """批量版verify_coordinate_conversion：world_pts为 (N, 3)，结果中的各项为长度N的数组"""
+        map_coords, errors = world_to_map_batch(np.asarray(world_pts, dtype=np.float64),
+                                                *self.map_transform_params(), self.GROUND_HEIGHT)
+        return {
+            'map_coords': map_coords,
+            'position_error': errors,
+            'error_acceptable': errors < self.COORD_ERROR_TOLERANCE
+        }
+    
+    def get_scene_info(self) -> dict:
+        """场景边界和中心（使用初始化时缓存的列表）"""
+        return {
+            'bounds': {
+                'min': self._bounds_min_list,
+                'max': self._bounds_max_list
+            },
+            'center': self._center_list
+        }
+    
+    def get_fpv_rgb(self) -> np.ndarray:
+        """获取第一人称视角图像的RGB视图 (H, W, 3)
+        
+        habitat的COLOR传感器总是输出RGBA；这里返回丢弃alpha的跨步视图，不产生拷贝，
+        由调用方在写入目标缓冲区时一次性拷贝3/4的数据量。
+        """
+        return self.get_fpv_observation()[..., :3]
+    
+    def is_navigable_batch(self, positions: np.ndarray) -> np.ndarray:
+        """批量检查 (N, 3) 世界坐标是否可导航，返回长度为N的布尔数组"""
+        return np.fromiter((self.is_navigable(pos[0], pos[2]) for pos in positions),
+                           dtype=bool, count=len(positions))
+    
+    def count_clear_steps(self, start_pos: np.ndarray, positions: np.ndarray) -> int:
+        """从start_pos沿直线依次移动到positions (N, 3)，返回遇到阻挡之前可走的步数"""
+        navigable = self.is_navigable_batch(positions)
+        blocked = np.flatnonzero(~navigable)
+        return int(blocked[0]) if blocked.size else len(positions)
+    
+    def _generate_base_map(self):
+        """生成基础地图后去掉正交传感器
+        
+        俯视图只在这里渲染一次。get_sensor_observations()会渲染并读回所有传感器，
+        保留正交传感器意味着之后每帧FPV观测都要额外渲染一张全分辨率俯视图。
+        """
+        super()._generate_base_map()
+        # 基础地图是正交观测四周加上边距；尺寸不符说明正交传感器没有按正式分辨率重新配置
+        map_height, map_width = self._ortho_resolution
+        expected_size = (map_width + self.MAP_PADDING_LEFT + self.MAP_PADDING_RIGHT,
+                         map_height + self.MAP_PADDING_TOP + self.MAP_PADDING_BOTTOM)
+        if self.base_map_image.size != expected_size:
+            raise RuntimeError(f"Orthographic observation was not rendered at {map_width}x{map_height}, "
+                               f"base map size is {self.base_map_image.size}")
+        
+        backend_cfg, fpv_sensor_spec = self._sim_config
+        # scene_id不变，reconfigure不会重新加载场景；传入新建的agent配置，
+        # 原地修改模拟器持有的配置会让新旧配置相等，reconfigure直接返回
+        self.sim.reconfigure(habitat_sim.Configuration(
+            backend_cfg, [self._build_agent_config([fpv_sensor_spec])]))
+        self.agent = self.sim.get_agent(0)
+        if "ortho_sensor" in self.agent.scene_node.subtree_sensors:
+            raise RuntimeError("Orthographic sensor is still attached after reconfigure")
+        print("Orthographic sensor removed after base map generation (FPV-only rendering)")
+        
+        # 预热坐标转换的JIT内核，避免第一帧承担编译/加载缓存的延迟
+        self.world_to_map_coords(self.scene_center)
+        self.verify_coord_batch(np.asarray(self.scene_center, dtype=np.float64)[None, :])
+    
+    @staticmethod
+    def _build_ortho_sensor_spec(height: int, width: int) -> habitat_sim.CameraSensorSpec:
+        """创建生成基础地图用的正交俯视传感器"""
+        ortho_sensor_spec = habitat_sim.CameraSensorSpec()
+        ortho_sensor_spec.uuid = "ortho_sensor"
+        ortho_sensor_spec.sensor_type = habitat_sim.SensorType.COLOR
+        ortho_sensor_spec.resolution = [height, width]
+        ortho_sensor_spec.position = mn.Vector3(0, 0, 0)
+        ortho_sensor_spec.sensor_subtype = habitat_sim.SensorSubType.ORTHOGRAPHIC
+        return ortho_sensor_spec
+    
+    @staticmethod
+    def _build_agent_config(sensor_specifications: list) -> habitat_sim.agent.AgentConfiguration:
+        """创建人类尺寸的agent配置；每次reconfigure都新建，不修改模拟器已持有的配置"""
+        agent_cfg = habitat_sim.agent.AgentConfiguration()
+        agent_cfg.sensor_specifications = sensor_specifications
+        
+        # 设置人类agent的形状和大小
+        agent_cfg.height = 1.7  # 人类平均身高
+        agent_cfg.radius = 0.3  # 人类身体半径（用于碰撞检测）
+        
+        agent_cfg.action_space = {
+            "move_forward": habitat_sim.agent.ActionSpec(
+                "move_forward", habitat_sim.agent.ActuationSpec(amount=0.25)
+            ),
+            "move_backward": habitat_sim.agent.ActionSpec(
+                "move_backward", habitat_sim.agent.ActuationSpec(amount=0.25)
+            ),
+            "turn_left": habitat_sim.agent.ActionSpec(
+                "turn_left", habitat_sim.agent.ActuationSpec(amount=10.0)
+            ),
+            "turn_right": habitat_sim.agent.ActionSpec(
+                "turn_right", habitat_sim.agent.ActuationSpec(amount=10.0)
+            ),
+        }
+        return agent_cfg
+    
     def _initialize_simulator(self):
         """重写初始化方法以支持GPU设备选择，保持父类的修复功能"""
         # 配置后端 - 指定GPU设备
@@ -931,49 +1118,8 @@ class CustomHabitatSimulator(HabitatSimulator):
         fpv_sensor_spec.position = mn.Vector3(0, 1.7, 0)  # 人类平均视角高度1.7米
         fpv_sensor_spec.hfov = 90.0
         
-        # 获取场景边界以计算正交传感器分辨率
-        temp_sensor = habitat_sim.CameraSensorSpec()
-        temp_sensor.uuid = "temp_sensor"
-        temp_sensor.sensor_type = habitat_sim.SensorType.COLOR
-        temp_sensor.resolution = [64, 64]
-        
-        temp_agent_cfg = habitat_sim.agent.AgentConfiguration()
-        temp_agent_cfg.sensor_specifications = [temp_sensor]
-        
-        temp_sim = habitat_sim.Simulator(habitat_sim.Configuration(backend_cfg, [temp_agent_cfg]))
-        temp_bounds = temp_sim.pathfinder.get_bounds()
-        world_size_x = temp_bounds[1][0] - temp_bounds[0][0]
-        world_size_z = temp_bounds[1][2] - temp_bounds[0][2]
-        temp_sim.close()
-        
-        # 计算地图分辨率 - 提高地图质量
-        max_resolution = 2048  # 提高地图分辨率
-        aspect_ratio = world_size_x / world_size_z
-        
-        if aspect_ratio > 1:
-            map_width = max_resolution
-            map_height = int(max_resolution / aspect_ratio)
-        else:
-            map_height = max_resolution
-            map_width = int(max_resolution * aspect_ratio)
-        
-        print(f"地图分辨率: {map_width} x {map_height}")
-        
-        # 配置正交传感器
-        ortho_sensor_spec = habitat_sim.CameraSensorSpec()
-        ortho_sensor_spec.uuid = "ortho_sensor"
-        ortho_sensor_spec.sensor_type = habitat_sim.SensorType.COLOR
-        ortho_sensor_spec.resolution = [map_height, map_width]
-        ortho_sensor_spec.position = mn.Vector3(0, 0, 0)
-        ortho_sensor_spec.sensor_subtype = habitat_sim.SensorSubType.ORTHOGRAPHIC
-        
-        # 配置智能体 - 加载人类模型
-        agent_cfg = habitat_sim.agent.AgentConfiguration()
-        agent_cfg.sensor_specifications = [fpv_sensor_spec, ortho_sensor_spec]
-        
-        # 设置人类agent的形状和大小
-        agent_cfg.height = 1.7  # 人类平均身高
-        agent_cfg.radius = 0.3  # 人类身体半径（用于碰撞检测）
+        # 配置智能体 - 正交传感器先用占位分辨率，读取场景边界后再重新配置
+        agent_cfg = self._build_agent_config([fpv_sensor_spec, self._build_ortho_sensor_spec(64, 64)])
         
         # 尝试加载人类模型文件 - 使用URDF配置
         try:
@@ -988,33 +1134,45 @@ class CustomHabitatSimulator(HabitatSimulator):
         except Exception as e:
             print(f"Warning: Could not check agent model: {e}")
         
-        agent_cfg.action_space = {
-            "move_forward": habitat_sim.agent.ActionSpec(
-                "move_forward", habitat_sim.agent.ActuationSpec(amount=0.25)
-            ),
-            "move_backward": habitat_sim.agent.ActionSpec(
-                "move_backward", habitat_sim.agent.ActuationSpec(amount=0.25)
-            ),
-            "turn_left": habitat_sim.agent.ActionSpec(
-                "turn_left", habitat_sim.agent.ActuationSpec(amount=10.0)
-            ),
-            "turn_right": habitat_sim.agent.ActionSpec(
-                "turn_right", habitat_sim.agent.ActuationSpec(amount=10.0)
-            ),
-        }
+        # 实例化模拟器（只加载一次场景）
+        self.sim = habitat_sim.Simulator(habitat_sim.Configuration(backend_cfg, [agent_cfg]))
+        
+        # 获取场景边界以计算正交传感器分辨率
+        scene_bounds = self.sim.pathfinder.get_bounds()
+        world_size_x = scene_bounds[1][0] - scene_bounds[0][0]
+        world_size_z = scene_bounds[1][2] - scene_bounds[0][2]
+        
+        # 计算地图分辨率 - 提高地图质量
+        max_resolution = 2048  # 提高地图分辨率
+        aspect_ratio = world_size_x / world_size_z
         
-        # 创建完整配置
-        cfg = habitat_sim.Configuration(backend_cfg, [agent_cfg])
+        if aspect_ratio > 1:
+            map_width = max_resolution
+            map_height = int(max_resolution / aspect_ratio)
+        else:
+            map_height = max_resolution
+            map_width = int(max_resolution * aspect_ratio)
+        
+        print(f"地图分辨率: {map_width} x {map_height}")
         
-        # 实例化模拟器
-        self.sim = habitat_sim.Simulator(cfg)
+        # 使用正式分辨率重新配置正交传感器；scene_id不变，reconfigure不会重新加载场景。
+        # reconfigure在新旧配置相等时直接返回，而模拟器持有的就是上面的配置对象，
+        # 所以必须传入新建的传感器和agent配置，不能原地修改
+        self._ortho_resolution = (map_height, map_width)
+        self.sim.reconfigure(habitat_sim.Configuration(backend_cfg, [self._build_agent_config(
+            [fpv_sensor_spec, self._build_ortho_sensor_spec(map_height, map_width)])]))
         self.agent = self.sim.get_agent(0)
+        self._sim_config = (backend_cfg, fpv_sensor_spec)
         
         # 获取场景信息
-        self.scene_bounds = self.sim.pathfinder.get_bounds()
+        self.scene_bounds = scene_bounds
         self.scene_center = (self.scene_bounds[0] + self.scene_bounds[1]) / 2.0
         self.scene_size = self.scene_bounds[1] - self.scene_bounds[0]
         self.ortho_scale = max(self.scene_size[0], self.scene_size[2]) / 2.0
+        # 场景边界和中心的Python列表形式只计算一次，供get_scene_info复用
+        self._bounds_min_list = [float(v) for v in self.scene_bounds[0]]
+        self._bounds_max_list = [float(v) for v in self.scene_bounds[1]]
+        self._center_list = [float(v) for v in self.scene_center]
         
         print(f"Simulator initialized with GPU device {self.gpu_device_id}")
         print(f"Agent height: {agent_cfg.height}m, radius: {agent_cfg.radius}m")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+地图叠加层的标量计算 - 使用Numba JIT编译
+
+world_to_map把单个世界坐标转换为带padding的地图像素坐标；world_to_map_batch对一批
+世界坐标做同样的转换，并反算回世界坐标以验证转换精度。每帧绘制代理标记时用它一次
+得到标记位置和转换误差。fastmath允许编译器把仿射变换融合为FMA指令。
+planar_distances批量计算实际位置与目标点之间的XZ平面距离，用于坐标精度验证。
+未安装Numba时退化为普通Python函数，结果一致。
+"""
+
+import math
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """Numba不可用时的空装饰器"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def _clamp(value, low, high):
+    # min/max编译后为无分支的select指令，避免越界判断的分支预测失败
+    return min(max(value, low), high)
+
+
+@njit(cache=True, fastmath=True)
+def world_to_map(px, pz, min_x, min_z, range_x, range_z, map_width, map_height,
+                 pad_left, pad_top, image_width, image_height):
+    """世界坐标 (px, pz) -> 带padding的地图像素坐标 (map_x, map_y)
+
+    与HabitatSimulator.world_to_map_coords一致，结果限制在图像范围内。
+    """
+    map_x = int((px - min_x) / range_x * map_width + pad_left)
+    map_y = int((pz - min_z) / range_z * map_height + pad_top)
+    return _clamp(map_x, 0, image_width - 1), _clamp(map_y, 0, image_height - 1)
+
+
+@njit(cache=True, fastmath=True)
+def world_to_map_batch(points, min_x, min_z, range_x, range_z, map_width, map_height,
+                       pad_left, pad_top, image_width, image_height, ground_height):
+    """批量世界坐标 (N, 3) -> 地图像素坐标，并计算往返转换误差
+
+    正向转换与HabitatSimulator.world_to_map_coords一致，反向转换与map_coords_to_world一致
+    （Y使用固定的ground_height）。返回 (map_coords (N, 2) int64, errors (N,) float64)。
+    """
+    n = points.shape[0]
+    map_coords = np.empty((n, 2), dtype=np.int64)
+    errors = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        map_x, map_y = world_to_map(points[i, 0], points[i, 2], min_x, min_z, range_x, range_z,
+                                    map_width, map_height, pad_left, pad_top,
+                                    image_width, image_height)
+        map_coords[i, 0] = map_x
+        map_coords[i, 1] = map_y
+
+        world_x = min_x + (map_x - pad_left) / map_width * range_x
+        world_z = min_z + (map_y - pad_top) / map_height * range_z
+        dx = points[i, 0] - world_x
+        dy = points[i, 1] - ground_height
+        dz = points[i, 2] - world_z
+        errors[i] = math.sqrt(dx * dx + dy * dy + dz * dz)
+    return map_coords, errors
+
+
+@njit(cache=True, fastmath=True)
+def planar_distances(actual, targets):
+    """实际世界坐标 (N, 3) 与目标点 [x, z] (N, 2) 之间的XZ平面距离 (N,)"""
+    n = targets.shape[0]
+    distances = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        dx = actual[i, 0] - targets[i, 0]
+        dz = actual[i, 2] - targets[i, 1]
+        distances[i] = math.sqrt(dx * dx + dz * dz)
+    return distances
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+四元数辅助函数 - 逐帧动画使用的小型四元数运算
+
+四元数统一使用habitat的 [x, y, z, w] 顺序。
+如果已编译Cython扩展 _quatmath（见 setup_quatmath.py），则使用编译版本；
+否则回退到NumPy实现，两者结果一致。
+"""
+
+import math
+
+import numpy as np
+
+try:
+    import _quatmath
+    HAS_CYTHON_QUATMATH = True
+except ImportError:
+    _quatmath = None
+    HAS_CYTHON_QUATMATH = False
+
+
+def _as_f64(q) -> np.ndarray:
+    """转换为连续的float64数组（Cython typed memoryview要求）"""
+    return np.ascontiguousarray(q, dtype=np.float64)
+
+
+def _quat_mul_np(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    ax, ay, az, aw = a
+    bx, by, bz, bw = b
+    return np.array([
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+        aw * bw - ax * bx - ay * by - az * bz,
+    ], dtype=np.float64)
+
+
+def _quat_from_yaw_np(yaw: float) -> np.ndarray:
+    # 标量用math的三角函数，比np.sin/np.cos处理0维数组快
+    half = 0.5 * float(yaw)
+    return np.array([0.0, math.sin(half), 0.0, math.cos(half)], dtype=np.float64)
+
+
+def quat_mul(a, b) -> np.ndarray:
+    """Hamilton积 a * b"""
+    a = _as_f64(a)
+    b = _as_f64(b)
+    if HAS_CYTHON_QUATMATH:
+        out = np.empty(4, dtype=np.float64)
+        _quatmath.quat_mul(a, b, out)
+        return out
+    return _quat_mul_np(a, b)
+
+
+def quat_from_yaw(yaw: float) -> np.ndarray:
+    """绕Y轴旋转yaw弧度的四元数"""
+    if HAS_CYTHON_QUATMATH:
+        out = np.empty(4, dtype=np.float64)
+        _quatmath.quat_from_yaw(float(yaw), out)
+        return out
+    return _quat_from_yaw_np(yaw)
+
+
+def quat_from_yaw_batch(yaws) -> np.ndarray:
+    """一组绕Y轴旋转的四元数，返回形状为 (n, 4) 的数组"""
+    half = 0.5 * np.asarray(yaws, dtype=np.float64)
+    qs = np.zeros((half.shape[0], 4), dtype=np.float64)
+    qs[:, 1] = np.sin(half)
+    qs[:, 3] = np.cos(half)
+    return qs
+
+
+def quat_mul_batch(a, b) -> np.ndarray:
+    """逐行Hamilton积 a[i] * b，a形状为 (n, 4)，b为单个四元数"""
+    a = np.asarray(a, dtype=np.float64)
+    bx, by, bz, bw = _as_f64(b)
+    ax, ay, az, aw = a[:, 0], a[:, 1], a[:, 2], a[:, 3]
+    return np.stack([
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+        aw * bw - ax * bx - ay * by - az * bz,
+    ], axis=1)
+
+
+def quat_forward_xz(q) -> tuple:
+    """四元数旋转前向向量 (0, 0, -1) 后的XZ分量（Habitat中-Z轴是前方）"""
+    qx, qy, qz, qw = (float(c) for c in q)
+    return -2.0 * (qw * qy + qx * qz), 2.0 * (qx * qx + qy * qy) - 1.0
+
+
+def slerp_batch(q0, q1, n: int) -> np.ndarray:
+    """一次性计算n个球面线性插值四元数，t = 0, 1/n, ..., (n-1)/n
+
+    返回形状为 (n, 4) 的数组，用于逐帧动画循环中直接索引。
+    """
+    q0 = _as_f64(q0)
+    q1 = _as_f64(q1)
+    dot = float(np.dot(q0, q1))
+    # 取最短路径
+    if dot < 0.0:
+        q1 = -q1
+        dot = -dot
+    ts = np.linspace(0.0, 1.0, n, endpoint=False)
+    if dot > 0.9995:
+        # 夹角很小时退化为归一化线性插值，避免除以接近0的sin
+        qs = q0 + ts[:, None] * (q1 - q0)
+        return qs / np.linalg.norm(qs, axis=1, keepdims=True)
+    omega = np.arccos(dot)
+    sin_omega = np.sin(omega)
+    a = np.sin((1.0 - ts) * omega) / sin_omega
+    b = np.sin(ts * omega) / sin_omega
+    return a[:, None] * q0 + b[:, None] * q1
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+视频写入器 - 逐帧流式编码
+
+优先使用PyAV + NVENC（h264_nvenc）在GPU上编码；NVENC不可用时使用PyAV的libx264，
+未安装PyAV时回退到cv2.VideoWriter（mp4v）。两种写入器接口一致：write(RGB帧) / close()。
+ThreadedVideoWriter可包装任一写入器，在后台线程中编码，使渲染与编码重叠进行。
+"""
+
+import queue
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+
+try:
+    import av
+except ImportError:
+    av = None
+
+# PyAV依次尝试的编码器
+PYAV_CODECS = ("h264_nvenc", "libx264")
+# NVENC编码参数：离线生成视频不需要低延迟模式，p3预设比p4更快，hq调优保证画质
+NVENC_OPTIONS = {"preset": "p3", "tune": "hq"}
+
+
+class PyAVVideoWriter:
+    """基于PyAV的流式视频写入器"""
+
+    def __init__(self, output_path: str, fps: int, width: int, height: int,
+                 codec: str = "h264_nvenc", gpu_device_id: Optional[int] = None):
+        self.output_path = output_path
+        self.codec = codec
+        self.container = av.open(output_path, mode="w")
+        try:
+            self.stream = self.container.add_stream(codec, rate=fps)
+            self.stream.width = width
+            self.stream.height = height
+            self.stream.pix_fmt = "yuv420p"
+            if codec.endswith("_nvenc"):
+                options = dict(NVENC_OPTIONS)
+                if gpu_device_id is not None:
+                    # 在与模拟器相同的GPU上编码
+                    options["gpu"] = str(gpu_device_id)
+                self.stream.options = options
+            elif codec == "libx264":
+                self.stream.options = {"preset": "veryfast"}
+            # 立即打开编码器，使NVENC不可用等错误在创建时暴露
+            self.stream.codec_context.open()
+        except Exception:
+            self.container.close()
+            raise
+
+    def write(self, frame_rgb: np.ndarray):
+        """写入一帧RGB图像 (H, W, 3) uint8"""
+        frame = av.VideoFrame.from_ndarray(frame_rgb, format="rgb24")
+        for packet in self.stream.encode(frame):
+            self.container.mux(packet)
+
+    def close(self):
+        """刷新编码器并关闭文件"""
+        try:
+            for packet in self.stream.encode(None):
+                self.container.mux(packet)
+        finally:
+            self.container.close()
+
+
+class OpenCVVideoWriter:
+    """基于cv2.VideoWriter的流式视频写入器（mp4v）"""
+
+    def __init__(self, output_path: str, fps: int, width: int, height: int):
+        self.output_path = output_path
+        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+        self.writer = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+        if not self.writer.isOpened():
+            raise RuntimeError(f"Could not open video writer for {output_path}")
+        # 复用的BGR缓冲区，cvtColor直接写入，不再逐帧分配
+        self._bgr = np.empty((height, width, 3), dtype=np.uint8)
+
+    def write(self, frame_rgb: np.ndarray):
+        """写入一帧RGB（或RGBA）图像 (H, W, 3|4) uint8"""
+        # 转换到BGR（OpenCV格式），SIMD实现比numpy负步长拷贝快，同时丢弃可能存在的alpha通道
+        code = cv2.COLOR_RGBA2BGR if frame_rgb.shape[2] == 4 else cv2.COLOR_RGB2BGR
+        cv2.cvtColor(frame_rgb, code, dst=self._bgr)
+        self.writer.write(self._bgr)
+
+    def close(self):
+        self.writer.release()
+
+
+def open_video_writer(output_path: str, fps: int, width: int, height: int,
+                      gpu_device_id: Optional[int] = None):
+    """打开流式视频写入器，按PYAV_CODECS顺序尝试，最后回退到OpenCV"""
+    if av is not None:
+        for codec in PYAV_CODECS:
+            try:
+                return PyAVVideoWriter(output_path, fps, width, height, codec=codec,
+                                       gpu_device_id=gpu_device_id)
+            except Exception as e:
+                print(f"    Warning: {codec} encoder unavailable ({e})")
+        print("    Warning: falling back to OpenCV mp4v encoder")
+    return OpenCVVideoWriter(output_path, fps, width, height)
+
+
+class ThreadedVideoWriter:
+    """在后台线程中编码的写入器包装
+
+    write()把帧拷贝到预分配的缓冲池中后立即返回，调用方可以马上覆盖自己的帧缓冲区；
+    缓冲区在编码后归还缓冲池循环使用，运行期间没有逐帧的大块内存分配。
+    缓冲池耗尽时write()阻塞，从而限制排队的帧数。编码线程中的异常会在下一次
+    write()或close()时重新抛出。
+    """
+
+    def __init__(self, writer, frame_shape: tuple, pool_size: int = 8):
+        self.writer = writer
+        self.output_path = writer.output_path
+        self._free_buffers = queue.Queue()
+        self._frames = queue.Queue()
+        for _ in range(pool_size):
+            buffer = np.empty(frame_shape, dtype=np.uint8)
+            # 预先写入一次，使页面在创建时就分配好，而不是在第一次编码时缺页
+            buffer.fill(0)
+            self._free_buffers.put(buffer)
+        self._error = None
+        self._thread = threading.Thread(target=self._encoder_loop, daemon=True)
+        self._thread.start()
+
+    def _encoder_loop(self):
+        while True:
+            buffer = self._frames.get()
+            if buffer is None:
+                break
+            try:
+                if self._error is None:
+                    self.writer.write(buffer)
+            except Exception as e:
+                # 记录错误后继续取帧并归还缓冲区，避免write()阻塞
+                self._error = e
+            finally:
+                self._free_buffers.put(buffer)
+
+    def write(self, frame_rgb: np.ndarray):
+        """拷贝一帧RGB图像并交给编码线程"""
+        if self._error is not None:
+            raise RuntimeError(f"Video encoding failed: {self._error}")
+        buffer = self._free_buffers.get()
+        np.copyto(buffer, frame_rgb)
+        self._frames.put(buffer)
+
+    def close(self):
+        """等待所有排队的帧编码完成，然后关闭内部写入器"""
+        self._frames.put(None)
+        self._thread.join()
+        self.writer.close()
+        if self._error is not None:
+            raise RuntimeError(f"Video encoding failed: {self._error}")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+指令合并（command_coalescing）的单元测试，不需要Habitat场景
+"""
+
+import sys
+import os
+
+src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from command_coalescing import ExactCommands, coalesce_commands
+
+
+def test_collinear_moves_merged():
+    """共线同向的连续移动去掉中间点，第一条移动指令保留"""
+    commands = [[0.0, 0.0], [1.0, 0.0], [2.0, 0.0], [3.0, 0.0]]
+    assert coalesce_commands(commands) == [[0.0, 0.0], [3.0, 0.0]]
+
+
+def test_opposite_moves_not_merged():
+    """共线但反向（折返）的移动不合并"""
+    commands = [[0.0, 0.0], [2.0, 0.0], [1.0, 0.0]]
+    assert coalesce_commands(commands) == commands
+
+
+def test_turning_moves_not_merged():
+    """不共线的移动不合并"""
+    commands = [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0]]
+    assert coalesce_commands(commands) == commands
+
+
+def test_same_direction_turns_merged():
+    """同向的连续旋转合并为一次旋转"""
+    commands = [["left", 90], ["left", 45], [1.0, 0.0]]
+    assert coalesce_commands(commands) == [["left", 135.0], [1.0, 0.0]]
+
+
+def test_opposite_turns_not_merged():
+    """不折叠时反向的连续旋转保持原样"""
+    commands = [["left", 180], ["right", 180]]
+    assert coalesce_commands(commands) == commands
+
+
+def test_input_not_modified():
+    """合并结果是新列表，不修改传入的指令"""
+    commands = [[0.0, 0.0], [1.0, 0.0], [2.0, 0.0]]
+    coalesce_commands(commands)
+    assert commands == [[0.0, 0.0], [1.0, 0.0], [2.0, 0.0]]
+
+
+def test_fold_cancelling_rotations():
+    """折叠时抵消的连续旋转（左转4次90度、左右各180度）被丢弃，前后的移动照常合并"""
+    commands = [[0.0, 0.0], ["left", 90], ["left", 90], ["left", 90], ["left", 90], [1.0, 0.0],
+                ["left", 180], ["right", 180], [2.0, 0.0]]
+    assert coalesce_commands(commands, fold_rotations=True) == [[0.0, 0.0], [2.0, 0.0]]
+
+
+def test_fold_net_rotation():
+    """折叠为带符号的净角度，超过360度的部分取模"""
+    assert coalesce_commands([["left", 90], ["right", 135]], fold_rotations=True) == [["right", 45.0]]
+    assert coalesce_commands([["left", 300], ["left", 90]], fold_rotations=True) == [["left", 30.0]]
+
+
+def test_fold_keeps_single_rotation():
+    """单独的一条旋转指令不折叠，整圈旋转的动画保留"""
+    assert coalesce_commands([["left", 360]], fold_rotations=True) == [["left", 360]]
+    assert coalesce_commands([[0.0, 0.0], ["right", 720.5], [1.0, 0.0]],
+                             fold_rotations=True) == [[0.0, 0.0], ["right", 720.5], [1.0, 0.0]]
+
+
+def test_fold_disabled_by_default():
+    """不指定fold_rotations时同向旋转只相加，不取模也不丢弃"""
+    commands = [["left", 90], ["left", 90], ["left", 90], ["left", 90]]
+    assert coalesce_commands(commands) == [["left", 360.0]]
+
+
+def test_exact_commands_not_folded():
+    """ExactCommands序列即使fold_rotations为True也不折叠，抵消的旋转保留"""
+    commands = ExactCommands([["left", 180], ["right", 180], ["left", 90], ["left", 90]])
+    assert coalesce_commands(commands, fold_rotations=True) == [["left", 180], ["right", 180], ["left", 180.0]]
@@ -7,16 +7,20 @@ import subprocess
 import sys
 import os
 
+# 项目路径（src加入模块搜索路径，只在导入时执行一次）
+PROJECT_PATH = '/home/yaoaa/habitat-lab/video_app'
+SRC_PATH = os.path.join(PROJECT_PATH, 'src')
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
 def test_coordinate_accuracy():
     """测试坐标精度"""
     print("Testing coordinate accuracy...")
     
-    # 添加项目路径
-    project_path = '/home/yaoaa/habitat-lab/video_app'
-    sys.path.append(os.path.join(project_path, 'src'))
-    
     # 导入模块
+    import numpy as np
     from habitat_video_generator import HabitatVideoGenerator
+    from overlays_numba import planar_distances
     
     try:
         # 初始化生成器
@@ -37,6 +41,8 @@ def test_coordinate_accuracy():
         print("原始地图尺寸:", generator.simulator.base_map_image.size)
         print()
         
+        # 先移动到各个测试点并记录位置，之后用批量内核一次计算地图坐标和距离差
+        reached = []  # (目标x, 目标z, 对齐后的位置, 实际位置)
         for x, z in test_points:
             # 检查位置是否可导航
             navigable = generator.simulator.is_navigable(x, z)
@@ -49,20 +55,28 @@ def test_coordinate_accuracy():
                     
                     # 获取实际位置
                     actual_pos = generator.get_agent_position()
-                    
-                    # 计算地图坐标
-                    map_coords = generator.simulator.world_to_map_coords(snapped_pos)
-                    
-                    print(f"目标: ({x:.2f}, {z:.2f})")
-                    print(f"实际: ({actual_pos[0]:.3f}, {actual_pos[2]:.3f})")
-                    print(f"地图坐标: {map_coords}")
-                    print(f"距离差: {((actual_pos[0] - x)**2 + (actual_pos[2] - z)**2)**0.5:.3f}m")
-                    print("-" * 40)
+                    reached.append((x, z, snapped_pos, actual_pos))
                 else:
                     print(f"坐标 ({x}, {z}) 无法对齐到可导航位置")
             else:
                 print(f"坐标 ({x}, {z}) 不可导航")
         
+        if reached:
+            targets = np.array([(x, z) for x, z, _, _ in reached], dtype=np.float64)
+            snapped = np.array([snapped_pos for _, _, snapped_pos, _ in reached], dtype=np.float64)
+            actual = np.array([actual_pos for _, _, _, actual_pos in reached], dtype=np.float64)
+            
+            # 计算地图坐标和距离差（JIT内核）
+            map_coords = generator.simulator.verify_coord_batch(snapped)['map_coords'].tolist()
+            distances = planar_distances(actual, targets).tolist()
+            
+            for (x, z, _, actual_pos), map_xy, distance in zip(reached, map_coords, distances):
+                print(f"目标: ({x:.2f}, {z:.2f})")
+                print(f"实际: ({actual_pos[0]:.3f}, {actual_pos[2]:.3f})")
+                print(f"地图坐标: {tuple(map_xy)}")
+                print(f"距离差: {distance:.3f}m")
+                print("-" * 40)
+        
         generator.close()
         
     except Exception as e:
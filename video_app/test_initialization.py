@@ -3,6 +3,8 @@
 测试代理初始化逻辑
 """
 
+import itertools
+
 # 模拟测试HabitatVideoGenerator的初始化逻辑
 
 class MockVideoGenerator:
@@ -15,6 +17,9 @@ class MockVideoGenerator:
         """模拟处理指令序列"""
         print(f"\nProcessing command sequence with {len(commands)} commands")
         
+        # 第一个待执行指令的下标（跳过初始化指令时不拷贝列表）
+        start = 0
+        
         # 如果代理还未初始化位置，使用第一个指令来设置初始位置
         if not self.agent_initialized and len(commands) > 0:
             first_command = commands[0]
@@ -30,16 +35,17 @@ class MockVideoGenerator:
                 self.agent_initialized = True
                 
                 # 跳过第一个指令（因为代理已经在目标位置）
-                commands = commands[1:]
-                print(f"Skipping first command, remaining commands: {len(commands)}")
+                start = 1
+                print(f"Skipping first command, remaining commands: {len(commands) - start}")
             else:
                 # 第一个指令是旋转指令，使用场景中心作为初始位置
                 print("First command is rotation, initializing at scene center")
                 self.agent_initialized = True
         
         # 处理剩余指令
-        for i, command in enumerate(commands):
-            print(f"  Executing command {i+1}/{len(commands)}: {command}")
+        total = len(commands) - start
+        for i, command in enumerate(itertools.islice(commands, start, None)):
+            print(f"  Executing command {i+1}/{total}: {command}")
         
         return True
 
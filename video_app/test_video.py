@@ -4,8 +4,48 @@
 """
 
 import subprocess
+import sys
 import os
-import time
+import glob
+import shutil
+import tempfile
+import contextlib
+import queue
+import threading
+
+# main.py在处理完每条指令序列后输出的哨兵行
+SENTINEL = "__SEQUENCE_DONE__"
+
+# main.py的默认场景，测试前拷贝到内存文件系统，加载时不再读磁盘
+SCENE_PATH = "/home/yaoaa/habitat-lab/data/scene_datasets/habitat-test-scenes/van-gogh-room.glb"
+RAMDISK_DIR = "/dev/shm"
+
+
+@contextlib.contextmanager
+def staged_scene(scene_path, ramdisk_dir=RAMDISK_DIR):
+    """把场景文件及同名的附属文件（如.navmesh）拷贝到ramdisk中的临时目录，返回拷贝后的场景路径
+    
+    每次调用使用独立的临时目录（不同目录下的同名场景不会互相覆盖），退出时删除；
+    无法拷贝时返回原路径。
+    """
+    if not os.path.isdir(ramdisk_dir) or not os.path.isfile(scene_path):
+        yield scene_path
+        return
+    
+    staging_dir = tempfile.mkdtemp(prefix="habitat_scene_", dir=ramdisk_dir)
+    try:
+        staged_path = scene_path
+        try:
+            stem = os.path.splitext(scene_path)[0]
+            for src in glob.glob(glob.escape(stem) + ".*"):
+                shutil.copy2(src, os.path.join(staging_dir, os.path.basename(src)))
+            staged_path = os.path.join(staging_dir, os.path.basename(scene_path))
+        except OSError as e:
+            print(f"Warning: could not stage scene into {ramdisk_dir}: {e}")
+        yield staged_path
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
 
 def test_video_generation():
     """测试视频生成功能"""
@@ -21,39 +61,73 @@ def test_video_generation():
         '[["left", 90], [3.0, 0.8], ["right", 45]]'
     ]
     
-    for i, cmd in enumerate(test_commands, 1):
-        print(f"\n测试 {i}: {cmd}")
+    # 场景文件预先拷贝到ramdisk，主程序通过HAB_SCENE环境变量从内存加载；测试结束后删除拷贝
+    with staged_scene(SCENE_PATH) as scene_path:
+        print(f"场景: {scene_path}")
+        
+        # 只启动一次主程序（只加载一次场景和GPU上下文），通过管道逐条发送指令序列
+        # 使用当前解释器；-O跳过assert，PYTHONUNBUFFERED避免子进程输出滞留在缓冲区中
+        proc = subprocess.Popen(
+            [sys.executable, '-O', 'main.py', '--sentinel', SENTINEL],
+            env={**os.environ, 'HAB_SCENE': scene_path, 'PYTHONUNBUFFERED': '1'},
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            cwd='/home/yaoaa/habitat-lab/video_app'
+        )
         
-        # 准备进程输入
-        input_data = f"{cmd}\nexit\n"
+        # 后台线程读取输出，主线程按行等待（带超时）
+        lines = queue.Queue()
+        
+        def read_output():
+            for line in proc.stdout:
+                lines.put(line)
+            lines.put(None)
+        
+        threading.Thread(target=read_output, daemon=True).start()
         
         try:
-            # 运行主程序
-            result = subprocess.run(
-                ['python', 'main.py'],
-                input=input_data,
-                text=True,
-                capture_output=True,
-                timeout=60,  # 60秒超时
-                cwd='/home/yaoaa/habitat-lab/video_app'
-            )
-            
-            print("STDOUT:")
-            print(result.stdout)
-            
-            if result.stderr:
-                print("STDERR:")
-                print(result.stderr)
-            
-            if result.returncode != 0:
-                print(f"程序退出码: {result.returncode}")
+            for i, cmd in enumerate(test_commands, 1):
+                print(f"\n测试 {i}: {cmd}")
                 
-        except subprocess.TimeoutExpired:
-            print("测试超时")
-        except Exception as e:
-            print(f"测试失败: {e}")
-        
-        print("-" * 50)
+                try:
+                    # 先重置代理，每条序列都像单独启动程序时一样从头初始化位置和朝向
+                    proc.stdin.write(f"reset\n{cmd}\n")
+                    proc.stdin.flush()
+                    
+                    # 读取输出直到两条输入（reset和指令序列）各自的哨兵行
+                    print("STDOUT:")
+                    pending = 2
+                    while pending:
+                        line = lines.get(timeout=60)  # 60秒超时
+                        if line is None:
+                            print(f"程序退出码: {proc.wait()}")
+                            return
+                        if line.rstrip("\n").endswith(SENTINEL):
+                            pending -= 1
+                            continue
+                        print(line, end="")
+                        
+                except queue.Empty:
+                    print("测试超时")
+                    return
+                except Exception as e:
+                    print(f"测试失败: {e}")
+                    return
+                
+                print("-" * 50)
+            
+            proc.stdin.write("exit\n")
+            proc.stdin.flush()
+            proc.wait(timeout=60)
+            if proc.returncode != 0:
+                print(f"程序退出码: {proc.returncode}")
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
 
 if __name__ == "__main__":
     test_video_generation()